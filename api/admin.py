@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import Experiment
+from .models import BatchSubmission, Experiment, ResultManifest
 # Register your models here.
 
 
-admin.site.register(Experiment)
\ No newline at end of file
+admin.site.register(Experiment)
+admin.site.register(ResultManifest)
+admin.site.register(BatchSubmission)
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from api.authentication import CachingTokenAuthentication
+from api.models import Experiment
+from api.views import (
+    ExperimentCMDOutput,
+    ExperimentGyrationRadiusAPIView,
+    ExperimentRecommendStructuresAPIView,
+    ExperimentResultsAPIView,
+    ExperimentRMSDAPIView,
+    format_status_event,
+    get_status_changes,
+    parse_stream_cursor,
+    parse_stream_wait,
+)
+
+
+# boto3 has no native asyncio support, so S3 calls run on a dedicated pool sized
+# to the S3 client's connection pool. The event loop itself is never blocked,
+# and a slow read only costs a pool thread, not a whole worker.
+_s3_executor = None
+
+
+def get_s3_executor():
+    global _s3_executor
+    if _s3_executor is None:
+        _s3_executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_S3_MAX_WORKERS,
+            thread_name_prefix="async-s3",
+        )
+    return _s3_executor
+
+
+async def run_s3(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_s3_executor(), lambda: func(*args, **kwargs))
+
+
+async def get_user(request):
+    authenticator = CachingTokenAuthentication()
+    try:
+        credentials = await sync_to_async(authenticator.authenticate)(request)
+    except AuthenticationFailed as e:
+        credentials = None
+        detail = str(e.detail)
+    else:
+        detail = "Authentication credentials were not provided."
+    if credentials is None:
+        response = JsonResponse({"detail": detail}, status=401)
+        response["WWW-Authenticate"] = authenticator.authenticate_header(request)
+        return None, response
+    return credentials[0], None
+
+
+async def get_user_experiment(request, experiment_id):
+    user, error = await get_user(request)
+    if error:
+        return None, error
+
+    try:
+        experiment = await Experiment.objects.aget(id=experiment_id, user=user)
+    except Experiment.DoesNotExist:
+        return None, JsonResponse({"error": "Experiment not found"}, status=404)
+
+    return experiment, None
+
+
+async def _result_response(view_class, request, experiment_id):
+    """
+    Serve a ConditionalResultMixin view without tying up a worker thread on
+    S3: database work runs through sync_to_async and the body is built on
+    the S3 pool. The sync view's own methods do the work, so ETags, cache
+    entries and bodies match the sync endpoint exactly.
+    """
+    experiment, error = await get_user_experiment(request, experiment_id)
+    if error:
+        return error
+
+    view = view_class()
+    try:
+        spec = await sync_to_async(view.get_result_spec)(request, experiment)
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+
+    parts = await sync_to_async(view.get_terminal_parts)(request, experiment, spec.artifact_keys)
+    status, data, headers = await run_s3(
+        view.resolve_conditional, request, experiment, parts, spec.build, spec.presigned_keys
+    )
+    if status == 304:
+        return HttpResponseNotModified(headers=headers)
+    return JsonResponse(data, status=status, safe=False, headers=headers)
+
+
+@require_GET
+async def experiment_results(request, experiment_id):
+    return await _result_response(ExperimentResultsAPIView, request, experiment_id)
+
+
+@require_GET
+async def experiment_recommend_structures(request, experiment_id):
+    return await _result_response(ExperimentRecommendStructuresAPIView, request, experiment_id)
+
+
+@require_GET
+async def experiment_gyration_radius(request, experiment_id):
+    return await _result_response(ExperimentGyrationRadiusAPIView, request, experiment_id)
+
+
+@require_GET
+async def experiment_rmsd(request, experiment_id):
+    return await _result_response(ExperimentRMSDAPIView, request, experiment_id)
+
+
+@require_GET
+async def experiment_cmd_output(request, experiment_id):
+    return await _result_response(ExperimentCMDOutput, request, experiment_id)
+
+
+@require_GET
+async def experiment_status_stream(request):
+    """
+    Async twin of ExperimentStatusStreamAPIView: the same cursor and event
+    format, but waiting happens on the event loop, so an open stream or a
+    long poll costs no thread while nothing changes.
+    """
+    user, error = await get_user(request)
+    if error:
+        return error
+
+    try:
+        cursor = await sync_to_async(parse_stream_cursor)(
+            request.headers.get("Last-Event-ID") or request.GET.get("since")
+        )
+        wait = parse_stream_wait(request.GET.get("wait"))
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+
+    if "text/event-stream" in request.headers.get("Accept", ""):
+        response = StreamingHttpResponse(_event_stream(user, cursor), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    deadline = time.monotonic() + wait
+    while True:
+        cursor, changed = await sync_to_async(get_status_changes)(user, cursor)
+        if changed or time.monotonic() >= deadline:
+            return JsonResponse({"cursor": cursor, "results": changed})
+        await asyncio.sleep(settings.EXPERIMENT_STREAM_POLL_INTERVAL)
+
+
+async def _event_stream(user, cursor):
+    yield f"retry: {settings.EXPERIMENT_STREAM_RETRY_MS}\n\n"
+
+    deadline = time.monotonic() + settings.EXPERIMENT_STREAM_TIMEOUT
+    last_sent = time.monotonic()
+    while time.monotonic() < deadline:
+        cursor, changed = await sync_to_async(get_status_changes)(user, cursor)
+        if changed:
+            yield format_status_event(cursor, changed)
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= settings.EXPERIMENT_STREAM_KEEPALIVE:
+            # Comment line keeps proxies from closing an idle connection.
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(settings.EXPERIMENT_STREAM_POLL_INTERVAL)
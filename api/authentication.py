@@ -0,0 +1,51 @@
+import copy
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+from .caches import TTLCache
+
+
+# Per-process; api.signals drops entries on logout, token changes and user
+# updates in this process, and the TTL bounds staleness in the others.
+_token_cache = None
+
+
+def get_token_cache():
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TTLCache(
+            max_size=settings.AUTH_TOKEN_CACHE_SIZE,
+            ttl=settings.AUTH_TOKEN_CACHE_TTL,
+        )
+    return _token_cache
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that remembers (user, token) per key, so warm
+    requests skip the Token/User query entirely. Every request gets its own
+    copies, since the cache is shared across threads and views mutate
+    request.user (permission caches, attribute changes before save).
+
+    Revocation is only immediate in the process that handled it; other
+    processes keep accepting a revoked token for up to AUTH_TOKEN_CACHE_TTL
+    seconds.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        cached = cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            cache.set(key, cached)
+
+        user, token = copy.copy(cached[0]), copy.copy(cached[1])
+        token.user = user
+        return user, token
+
+
+def invalidate_token(key):
+    get_token_cache().delete(key)
+
+
+def invalidate_user_tokens(user_id):
+    get_token_cache().delete_where(lambda entry: entry[0].pk == user_id)
@@ -22,6 +22,7 @@ def get_s3_client():
     if _s3_client is None:
         _s3_client = get_aws_session().client(
             "s3",
+            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
             config=Config(
                 max_pool_connections=50,
                 retries={"max_attempts": 5},
@@ -0,0 +1,254 @@
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from api.models import Experiment, StatusSequence, TERMINAL_STATES
+from .manifest import build_result_manifests
+from .aws_clients import get_batch_client
+
+
+logger = logging.getLogger(__name__)
+
+
+STATUS_FIELDS = [
+    'batch_status',
+    'batch_status_reason',
+    'batch_created_at',
+    'batch_started_at',
+    'batch_stopped_at',
+]
+
+JOB_STATUS_ORDER = {
+    'SUBMITTED': 0,
+    'PENDING': 1,
+    'RUNNABLE': 2,
+    'STARTING': 3,
+    'RUNNING': 4,
+    'SUCCEEDED': 5,
+    'FAILED': 5,
+}
+
+# AWS Batch rejects describe_jobs calls with more than 100 job IDs.
+DESCRIBE_JOBS_MAX_IDS = 100
+
+THROTTLING_ERROR_CODES = {
+    'TooManyRequestsException',
+    'ThrottlingException',
+    'Throttling',
+    'RequestLimitExceeded',
+}
+
+
+def get_active_experiments():
+    return (
+        Experiment.objects
+        .filter(batch_job_id__isnull=False)
+        .exclude(batch_job_id='')
+        .exclude(batch_status__in=TERMINAL_STATES)
+    )
+
+
+def refresh_batch_statuses(experiments):
+    experiments_to_update = [exp for exp in experiments if exp.batch_job_id]
+
+    if not experiments_to_update:
+        return 0
+
+    batch_job_ids = [exp.batch_job_id for exp in experiments_to_update]
+    jobs_map = describe_jobs(batch_job_ids)
+
+    changed = []
+    for exp in experiments_to_update:
+        job = jobs_map.get(exp.batch_job_id)
+        if job and apply_job_status(exp, job):
+            changed.append(exp)
+
+    save_experiment_statuses(changed)
+    return len(changed)
+
+
+def get_experiments_missing_manifests():
+    return (
+        Experiment.objects
+        .filter(batch_status__in=TERMINAL_STATES, result_manifest__isnull=True)
+        .exclude(results_folder_s3_url__isnull=True)
+        .exclude(results_folder_s3_url='')
+        .order_by('batch_status_updated_at', 'id')
+    )
+
+
+def save_experiment_statuses(experiments, build_manifests=True):
+    """
+    Persist status changes. With ``build_manifests`` the S3 listings of
+    newly finished experiments are taken right away; the webhook passes
+    False and leaves that to the poller.
+    """
+    if not experiments:
+        return
+
+    now = timezone.now()
+    with transaction.atomic():
+        version = next_status_version()
+        for exp in experiments:
+            exp.batch_status_updated_at = now
+            exp.status_version = version
+        Experiment.objects.bulk_update(
+            experiments, STATUS_FIELDS + ['batch_status_updated_at', 'status_version']
+        )
+
+    if build_manifests:
+        build_result_manifests([exp for exp in experiments if exp.batch_status in TERMINAL_STATES])
+
+
+def next_status_version():
+    """
+    Must run inside the transaction that saves the status change. The
+    UPDATE holds the counter row until commit, so a concurrent writer
+    waits, and a stream client whose cursor has passed a version can never
+    see an earlier one commit afterwards (unlike batch_status_updated_at,
+    which is taken before commit).
+    """
+    sequence = StatusSequence.objects.filter(pk=1)
+    if not sequence.update(value=F('value') + 1):
+        StatusSequence.objects.get_or_create(pk=1)
+        sequence.update(value=F('value') + 1)
+    return sequence.values_list('value', flat=True).get()
+
+
+def current_status_version():
+    return StatusSequence.objects.filter(pk=1).values_list('value', flat=True).first() or 0
+
+
+def apply_job_state_events(events):
+    """
+    Apply AWS Batch "Job State Change" events (the EventBridge envelope, or
+    just its ``detail``). Events are idempotent, and ones that would move a
+    job backwards, e.g. a late RUNNABLE after RUNNING, are ignored.
+    Malformed events are skipped. Result manifests are left to the poller so
+    the caller isn't held up listing S3. Returns the number of experiments
+    that changed.
+    """
+    details = [job_event_detail(event) for event in events]
+    details = [d for d in details if d is not None]
+    if not details:
+        return 0
+
+    experiments = {
+        exp.batch_job_id: exp
+        for exp in Experiment.objects.filter(
+            batch_job_id__in={d['jobId'] for d in details}
+        )
+    }
+
+    changed = {}
+    for detail in details:
+        exp = experiments.get(detail['jobId'])
+        if exp is None or not is_forward_transition(exp.batch_status, detail['status']):
+            continue
+        if apply_job_status(exp, detail):
+            changed[exp.pk] = exp
+
+    save_experiment_statuses(list(changed.values()), build_manifests=False)
+    return len(changed)
+
+
+def job_event_detail(event):
+    """
+    The job fields of an event, or None when it isn't a usable Batch job
+    state change (wrong shape, no jobId/status, non-numeric timestamps).
+    """
+    detail = event.get('detail', event) if isinstance(event, dict) else None
+    if not isinstance(detail, dict):
+        return None
+    if not isinstance(detail.get('jobId'), str) or not isinstance(detail.get('status'), str):
+        return None
+    if not detail['jobId'] or not detail['status']:
+        return None
+    for key in ('createdAt', 'startedAt', 'stoppedAt'):
+        value = detail.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return None
+    reason = detail.get('statusReason')
+    if reason is not None and not isinstance(reason, str):
+        return None
+    return detail
+
+
+def is_forward_transition(current, new):
+    if current is None:
+        return True
+    if current in TERMINAL_STATES:
+        return new == current
+    return JOB_STATUS_ORDER.get(new, 0) >= JOB_STATUS_ORDER.get(current, 0)
+
+
+def describe_jobs(batch_job_ids):
+    job_ids = list(dict.fromkeys(batch_job_ids))
+    chunks = [
+        job_ids[i:i + DESCRIBE_JOBS_MAX_IDS]
+        for i in range(0, len(job_ids), DESCRIBE_JOBS_MAX_IDS)
+    ]
+    if not chunks:
+        return {}
+
+    batch_client = get_batch_client()
+    workers = min(settings.BATCH_DESCRIBE_JOBS_WORKERS, len(chunks))
+
+    jobs_map = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_describe_jobs_chunk, batch_client, chunk)
+            for chunk in chunks
+        ]
+        for chunk, future in zip(chunks, futures):
+            try:
+                for job in future.result():
+                    jobs_map[job['jobId']] = job
+            except Exception as e:
+                logger.error("Error fetching batch statuses for %d jobs: %s", len(chunk), e)
+
+    return jobs_map
+
+
+def _describe_jobs_chunk(batch_client, job_ids):
+    attempts = settings.BATCH_DESCRIBE_JOBS_MAX_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        try:
+            return batch_client.describe_jobs(jobs=job_ids)['jobs']
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code')
+            if code not in THROTTLING_ERROR_CODES or attempt == attempts:
+                raise
+            # Full-jitter backoff so throttled chunks don't retry in lockstep.
+            time.sleep(random.uniform(0, 0.2 * 2 ** attempt))
+
+
+def apply_job_status(experiment, job_data):
+    values = {
+        'batch_status': job_data['status'],
+        'batch_status_reason': job_data.get('statusReason', ''),
+    }
+    for field, key in (
+        ('batch_created_at', 'createdAt'),
+        ('batch_started_at', 'startedAt'),
+        ('batch_stopped_at', 'stoppedAt'),
+    ):
+        if job_data.get(key):
+            values[field] = convert_timestamp(job_data[key])
+
+    changed = False
+    for field, value in values.items():
+        if getattr(experiment, field) != value:
+            setattr(experiment, field, value)
+            changed = True
+    return changed
+
+
+def convert_timestamp(timestamp_ms):
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=dt_timezone.utc)
@@ -0,0 +1,426 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from django.conf import settings
+from .aws_clients import get_s3_client
+
+
+class PresignedUrlCache:
+    """
+    LRU cache of presigned URLs keyed by (bucket, key, method). A cached URL
+    is handed out again as long as it still has at least ``min_ttl`` seconds
+    of validity left; otherwise it is re-signed.
+    """
+
+    def __init__(self, max_size, min_ttl):
+        self.max_size = max_size
+        self.min_ttl = min_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_url(self, bucket, key, method="get_object", expires=3600):
+        cache_key = (bucket, key, method)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[1] - now >= self.min_ttl:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        url = get_s3_client().generate_presigned_url(
+            method,
+            Params={"Bucket": bucket, "Key": key},
+            ExpiresIn=expires,
+        )
+
+        with self._lock:
+            self._entries[cache_key] = (url, now + expires)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return url
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class TTLCache:
+    """
+    Thread-safe LRU whose entries also expire ``ttl`` seconds after being
+    stored.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for key in [k for k, (v, _) in self._entries.items() if predicate(v)]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class VisualizationCache:
+    """
+    Two-tier cache for rendered structure HTML: a per-process LRU in front of
+    an optional directory shared by every worker on the host. Keys are content
+    hashes, so entries never go stale and are written once. The directory is
+    trimmed least-recently-used to ``max_bytes``.
+    """
+
+    def __init__(self, max_entries, directory=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        html = self._read_disk(key)
+        with self._lock:
+            if html is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._remember(key, html)
+        return html
+
+    def set(self, key, html):
+        self._remember(key, html)
+        if self.directory and not os.path.exists(self._path(key)):
+            self._write_disk(key, html)
+            if self.max_bytes is not None:
+                evict_least_recently_used(self.directory, self.max_bytes)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _remember(self, key, html):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.html")
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                html = f.read()
+            # File mtime doubles as the LRU timestamp.
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return None
+        return html
+
+    def _write_disk(self, key, html):
+        # Write to a temp file and rename so other workers never see partial files.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class TrajectoryStore:
+    """
+    On-disk columnar copies of trajectory CSVs (x/y series), one directory of
+    .npy files per (bucket, key, ETag). Entries are written once, atomically,
+    memory-mapped on read, and evicted least-recently-used once the store
+    grows past ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, bucket, key, etag):
+        path = self._path(bucket, key, etag)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            columns = {
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                for name in meta["columns"]
+            }
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # Directory mtime doubles as the LRU timestamp.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return columns
+
+    def put(self, bucket, key, etag, columns):
+        path = self._path(bucket, key, etag)
+        if os.path.exists(path):
+            return
+
+        tmp_path = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        try:
+            for name, values in columns.items():
+                np.save(os.path.join(tmp_path, f"{name}.npy"), values, allow_pickle=False)
+            with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+                json.dump({"bucket": bucket, "key": key, "etag": etag, "columns": list(columns)}, f)
+            os.rename(tmp_path, path)
+        except (OSError, ValueError, TypeError):
+            # Lost the race to another worker, the disk is full, or a column
+            # can't be stored without pickling (object dtype); either way the
+            # caller already has the data in memory, so just skip caching.
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+
+        self.evict()
+
+    def evict(self):
+        evict_least_recently_used(self.directory, self.max_bytes)
+
+    def _path(self, bucket, key, etag):
+        digest = hashlib.sha256(f"{bucket}/{key}:{etag}".encode()).hexdigest()
+        return os.path.join(self.directory, digest)
+
+
+class BlobCache:
+    """
+    Read-through disk cache for immutable S3 objects, content-addressed by
+    (bucket, key, ETag) and shared by every worker process on the host.
+    Downloads land in a temp file and are renamed into place, so readers
+    never see partial objects. Hit/miss/byte counters are per process.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.bytes_fetched = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def open(self, bucket, key, etag):
+        path = self.cached_path(bucket, key, etag)
+        if path is not None:
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                # Evicted by another worker in the meantime.
+                return self._fetch(bucket, key, etag)
+            with self._lock:
+                self.hits += 1
+                self.bytes_served += os.fstat(f.fileno()).st_size
+            return f
+        return self._fetch(bucket, key, etag)
+
+    def cached_path(self, bucket, key, etag):
+        path = self._path(bucket, key, etag)
+        try:
+            # File mtime doubles as the LRU timestamp.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_served": self.bytes_served,
+                "bytes_fetched": self.bytes_fetched,
+            }
+
+    def _fetch(self, bucket, key, etag):
+        path = self._path(bucket, key, etag)
+        response = get_s3_client().get_object(Bucket=bucket, Key=key, IfMatch=etag)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f, response["Body"] as body:
+                shutil.copyfileobj(body, f, 1024 * 1024)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        # Open before evicting so the handle stays valid even if this entry goes.
+        f = open(path, "rb")
+        with self._lock:
+            self.misses += 1
+            self.bytes_fetched += size
+        self.evict()
+        return f
+
+    def evict(self):
+        evict_least_recently_used(self.directory, self.max_bytes)
+
+    def _path(self, bucket, key, etag):
+        digest = hashlib.sha256(f"{bucket}/{key}:{etag}".encode()).hexdigest()
+        return os.path.join(self.directory, digest)
+
+
+def evict_least_recently_used(directory, max_bytes):
+    """
+    Delete the oldest-mtime entries (files or directories) in ``directory``
+    until it fits in ``max_bytes``. Dot-prefixed temp entries are skipped.
+    """
+    entries = []
+    total = 0
+    for entry in os.scandir(directory):
+        if entry.name.startswith("."):
+            continue
+        try:
+            if entry.is_dir():
+                size = sum(e.stat().st_size for e in os.scandir(entry.path))
+            else:
+                size = entry.stat().st_size
+            entries.append((entry.stat().st_mtime, size, entry.path))
+        except FileNotFoundError:
+            continue
+        total += size
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        total -= size
+
+
+_presigned_url_cache = None
+_visualization_cache = None
+_trajectory_store = None
+_blob_cache = None
+
+
+def get_presigned_url_cache():
+    global _presigned_url_cache
+    if _presigned_url_cache is None:
+        _presigned_url_cache = PresignedUrlCache(
+            max_size=settings.PRESIGNED_URL_CACHE_SIZE,
+            min_ttl=settings.PRESIGNED_URL_MIN_TTL,
+        )
+    return _presigned_url_cache
+
+
+def presign_get_url(bucket, key, expires=3600):
+    return get_presigned_url_cache().get_url(bucket, key, expires=expires)
+
+
+def get_visualization_cache():
+    global _visualization_cache
+    if _visualization_cache is None:
+        _visualization_cache = VisualizationCache(
+            max_entries=settings.VISUALIZATION_CACHE_SIZE,
+            directory=settings.VISUALIZATION_CACHE_DIR,
+            max_bytes=settings.VISUALIZATION_CACHE_MAX_BYTES,
+        )
+    return _visualization_cache
+
+
+def get_trajectory_store():
+    global _trajectory_store
+    if _trajectory_store is None:
+        _trajectory_store = TrajectoryStore(
+            directory=settings.TRAJECTORY_CACHE_DIR,
+            max_bytes=settings.TRAJECTORY_CACHE_MAX_BYTES,
+        )
+    return _trajectory_store
+
+
+def get_blob_cache():
+    global _blob_cache
+    if _blob_cache is None:
+        _blob_cache = BlobCache(
+            directory=settings.BLOB_CACHE_DIR,
+            max_bytes=settings.BLOB_CACHE_MAX_BYTES,
+        )
+    return _blob_cache
@@ -0,0 +1,60 @@
+import logging
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.batch_status import get_active_experiments, get_experiments_missing_manifests, refresh_batch_statuses
+from api.manifest import build_result_manifests
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Refresh AWS Batch status for all non-terminal experiments on a schedule."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.BATCH_STATUS_POLL_INTERVAL,
+            help="Seconds to wait between polling rounds.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run a single polling round and exit.",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+
+        while True:
+            started = time.monotonic()
+            # Drop connections a failed round may have left unusable.
+            close_old_connections()
+            try:
+                self.poll()
+            except Exception:
+                # A locked database or an AWS outage must not end the poller;
+                # the next round simply tries again.
+                logger.exception("Batch status polling round failed")
+                if options["once"]:
+                    raise
+
+            if options["once"]:
+                return
+
+            elapsed = time.monotonic() - started
+            time.sleep(max(interval - elapsed, 0))
+
+    def poll(self):
+        experiments = list(get_active_experiments())
+        updated = refresh_batch_statuses(experiments)
+        logger.info("Polled %d active experiments, updated %d", len(experiments), updated)
+
+        # Experiments finished via /api/batch-events/ get their manifests here.
+        missing = list(get_experiments_missing_manifests()[:settings.RESULT_MANIFEST_BUILDS_PER_ROUND])
+        if missing:
+            build_result_manifests(missing)
+            logger.info("Built result manifests for %d experiments", len(missing))
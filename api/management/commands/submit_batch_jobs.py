@@ -0,0 +1,50 @@
+import logging
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.submissions import process_submissions
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Submit AWS Batch jobs for experiments waiting in the submission outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.BATCH_SUBMISSION_POLL_INTERVAL,
+            help="Seconds to wait when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process a single batch and exit.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Drop connections a failed round may have left unusable.
+            close_old_connections()
+            try:
+                submitted, failed = process_submissions()
+            except Exception:
+                # Claimed rows keep their lease and are retried once it runs
+                # out, so a failed round only needs logging.
+                logger.exception("Batch submission round failed")
+                if options["once"]:
+                    raise
+                submitted = failed = 0
+            else:
+                if submitted or failed:
+                    logger.info("Submitted %d jobs, %d failed", submitted, failed)
+
+            if options["once"]:
+                return
+
+            # Keep draining while there is a backlog; otherwise wait for more.
+            if not submitted and not failed:
+                time.sleep(options["interval"])
@@ -0,0 +1,79 @@
+import logging
+from django.db import IntegrityError, transaction
+from api.models import ResultArtifact, ResultManifest, TERMINAL_STATES
+from .utils import classify_result_key, list_s3_objects, parse_s3_uri
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_result_manifest(experiment):
+    bucket, prefix = parse_s3_uri(experiment.results_folder_s3_url)
+    prefix = prefix.rstrip("/") + "/"
+    objects = list_s3_objects(bucket, prefix)
+
+    try:
+        with transaction.atomic():
+            manifest = ResultManifest.objects.create(
+                experiment=experiment, bucket=bucket, prefix=prefix
+            )
+            ResultArtifact.objects.bulk_create([
+                ResultArtifact(
+                    manifest=manifest,
+                    key=obj["key"],
+                    size=obj["size"],
+                    etag=obj["etag"],
+                    category=classify_result_key(obj["key"]),
+                )
+                for obj in objects
+            ])
+    except IntegrityError:
+        # Another worker built it first; results are immutable so theirs is as good.
+        manifest = ResultManifest.objects.get(experiment=experiment)
+
+    return manifest
+
+
+def build_result_manifests(experiments):
+    for experiment in experiments:
+        if not experiment.results_folder_s3_url:
+            continue
+        try:
+            build_result_manifest(experiment)
+        except Exception as e:
+            logger.error("Error building result manifest for experiment %s: %s", experiment.id, e)
+
+
+def get_result_manifest(experiment):
+    """
+    Manifest of a finished experiment, built on first use if the poller
+    hasn't done so yet. Returns None while the job is still running, in which
+    case callers go to S3 directly.
+    """
+    if experiment.batch_status not in TERMINAL_STATES:
+        return None
+
+    try:
+        return experiment.result_manifest
+    except ResultManifest.DoesNotExist:
+        return build_result_manifest(experiment)
+
+
+def get_result_objects(experiment):
+    manifest = get_result_manifest(experiment)
+    if manifest is None:
+        return None
+
+    return list(
+        manifest.artifacts
+        .order_by("key")
+        .values("key", "size", "etag", "category")
+    )
+
+
+def get_artifact_etag(experiment, key):
+    manifest = get_result_manifest(experiment)
+    if manifest is None:
+        return None
+
+    return manifest.artifacts.filter(key=key).values_list("etag", flat=True).first()
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_experiment_batch_created_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='experiment',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='experiment_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experiment',
+            index=models.Index(fields=['user', 'batch_status'], name='experiment_user_status_idx'),
+        ),
+    ]
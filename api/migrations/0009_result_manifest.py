@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_experiment_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultManifest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(max_length=255)),
+                ('prefix', models.CharField(max_length=1024)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('experiment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result_manifest', to='api.experiment')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResultArtifact',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=1024)),
+                ('size', models.BigIntegerField()),
+                ('etag', models.CharField(max_length=100)),
+                ('category', models.CharField(blank=True, choices=[('reports', 'Reports'), ('visualizations', 'Visualizations'), ('recommended_structures', 'Recommended structures')], max_length=50, null=True)),
+                ('manifest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artifacts', to='api.resultmanifest')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('manifest', 'key'), name='result_artifact_unique_key')],
+            },
+        ),
+    ]
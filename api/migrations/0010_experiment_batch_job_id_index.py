@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_result_manifest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='experiment',
+            name='batch_job_id',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
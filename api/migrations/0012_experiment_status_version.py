@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_status_sequence(apps, schema_editor):
+    apps.get_model('api', 'StatusSequence').objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_batch_submission'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusSequence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='experiment',
+            name='status_version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='experiment',
+            index=models.Index(fields=['user', 'status_version'], name='experiment_user_version_idx'),
+        ),
+        migrations.RunPython(create_status_sequence, migrations.RunPython.noop),
+    ]
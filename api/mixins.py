@@ -0,0 +1,175 @@
+import hashlib
+import json
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.response import Response
+from api.models import Experiment, TERMINAL_STATES
+from .caches import presign_get_url
+from .manifest import get_result_manifest
+from .utils import parse_s3_uri
+
+
+# What a result view returns from get_result_spec: a zero-argument callable
+# producing the body, the manifest artifacts it reads, and the keys whose
+# presigned URLs it embeds.
+ResultSpec = namedtuple("ResultSpec", ["build", "artifact_keys", "presigned_keys"], defaults=[(), ()])
+
+
+class ConditionalResultMixin:
+    """
+    ETag / If-None-Match support for experiment result views. Views
+    implement get_result_spec; the async views in api.async_views drive the
+    same methods so both paths return identical responses.
+
+    For finished experiments the validator is derived from the terminal state,
+    the request, the manifest ETags of ``artifact_keys`` and the current
+    presigned URLs of ``presigned_keys``, so a matching request returns 304
+    without ``build`` (and its S3 reads) ever running. While the job is still
+    running, or when a finished job's body is empty or carries errors, the
+    body is built and hashed instead.
+
+    Terminal bodies are also kept in the ``RESULT_CACHE_ALIAS`` cache, keyed by
+    experiment, view and query, so a full GET of a finished experiment skips
+    ``build`` too. Presigned URLs in a cached body are swapped for current
+    ones on the way out rather than served as stored.
+    """
+
+    def get(self, request, experiment_id):
+        try:
+            experiment = Experiment.objects.get(id=experiment_id, user=request.user)
+        except Experiment.DoesNotExist:
+            return Response({"error": "Experiment not found"}, status=404)
+
+        return self.conditional_response(request, experiment, *self.get_result_spec(request, experiment))
+
+    def get_result_spec(self, request, experiment):
+        """
+        Return a ResultSpec for the response. Any database access happens
+        here; ``build`` itself should only talk to S3.
+        """
+        raise NotImplementedError
+
+    def conditional_response(self, request, experiment, build, artifact_keys=(), presigned_keys=()):
+        parts = self.get_terminal_parts(request, experiment, artifact_keys)
+        status, data, headers = self.resolve_conditional(request, experiment, parts, build, presigned_keys)
+        return Response(data, status=status, headers=headers)
+
+    def get_terminal_parts(self, request, experiment, artifact_keys):
+        """
+        What a finished experiment's response depends on, or None while the
+        job is still running.
+        """
+        if experiment.batch_status not in TERMINAL_STATES:
+            return None
+
+        parts = [
+            type(self).__name__,
+            str(experiment.id),
+            experiment.batch_status,
+            experiment.batch_stopped_at.isoformat() if experiment.batch_stopped_at else "",
+            json.dumps(sorted(request.GET.lists())),
+        ]
+
+        if artifact_keys:
+            manifest = get_result_manifest(experiment)
+            etags = dict(manifest.artifacts.filter(key__in=artifact_keys).values_list("key", "etag"))
+            parts.extend(f"{key}={etags.get(key)}" for key in artifact_keys)
+
+        return parts
+
+    def resolve_conditional(self, request, experiment, parts, build, presigned_keys=()):
+        """
+        Returns (status, data, headers). Touches S3 and the result cache but
+        not the database, so the async views can run it off the event loop.
+        """
+        if parts is not None:
+            etag = self._terminal_etag(experiment, parts, presigned_keys)
+            if self._etag_matches(request, etag):
+                return 304, None, self._cache_headers(etag, True, presigned_keys)
+            data = self._cached_build(request, experiment, parts, build, presigned_keys)
+            if self._is_cacheable(data):
+                return 200, data, self._cache_headers(etag, True, presigned_keys)
+        else:
+            data = build()
+
+        # Running jobs, and finished ones whose body reflects a failed fetch:
+        # validate against the body itself and keep max-age short, so a
+        # broken body is never pinned as immutable.
+        etag = self._hash(json.dumps(data, sort_keys=True, default=str))
+        if self._etag_matches(request, etag):
+            return 304, None, self._cache_headers(etag, False, presigned_keys)
+        return 200, data, self._cache_headers(etag, False, presigned_keys)
+
+    def _terminal_etag(self, experiment, parts, presigned_keys):
+        parts = list(parts)
+        if presigned_keys:
+            # Signing is local and cached, and the URLs change exactly when the
+            # body's URLs would, so clients are never left holding expired links.
+            bucket, _ = parse_s3_uri(experiment.results_folder_s3_url)
+            parts.extend(presign_get_url(bucket, key) for key in presigned_keys)
+
+        return self._hash("\n".join(parts))
+
+    def _cached_build(self, request, experiment, parts, build, presigned_keys):
+        cache = caches[settings.RESULT_CACHE_ALIAS]
+        # Scheme and host are part of the key because some bodies embed absolute URLs.
+        cache_key = f"experiment-result:{experiment.id}:" + self._hash(
+            "\n".join([request.scheme, request.get_host(), *parts])
+        )
+
+        data = cache.get(cache_key)
+        if data is None:
+            data = build()
+            if self._is_cacheable(data):
+                cache.set(cache_key, data)
+            return data
+
+        if presigned_keys:
+            bucket, _ = parse_s3_uri(experiment.results_folder_s3_url)
+            self._refresh_urls(data, bucket, set(presigned_keys))
+        return data
+
+    def _is_cacheable(self, data):
+        # Fetchers answer S3 failures with {} or an "error" entry rather than
+        # raising; don't pin those for the lifetime of the cache entry.
+        if isinstance(data, dict):
+            if not data or data.get("error") or data.get("errors"):
+                return False
+            return all(self._is_cacheable(v) for k, v in data.items() if k != "errors")
+        if isinstance(data, list):
+            return all(self._is_cacheable(v) for v in data)
+        return True
+
+    def _refresh_urls(self, data, bucket, keys):
+        if isinstance(data, dict):
+            if data.get("key") in keys and "url" in data:
+                data["url"] = presign_get_url(bucket, data["key"])
+            for value in data.values():
+                self._refresh_urls(value, bucket, keys)
+        elif isinstance(data, list):
+            for value in data:
+                self._refresh_urls(value, bucket, keys)
+
+    def _etag_matches(self, request, etag):
+        if_none_match = request.headers.get("If-None-Match")
+        if not if_none_match:
+            return False
+        etags = parse_etags(if_none_match)
+        # Weak comparison, as RFC 9110 prescribes for If-None-Match.
+        return "*" in etags or any(
+            candidate.removeprefix("W/") == quote_etag(etag) for candidate in etags
+        )
+
+    def _cache_headers(self, etag, terminal, presigned_keys):
+        if not terminal:
+            cache_control = f"private, max-age={settings.RESULT_RUNNING_MAX_AGE}"
+        elif presigned_keys:
+            cache_control = f"private, max-age={settings.RESULT_PRESIGNED_MAX_AGE}"
+        else:
+            cache_control = "private, max-age=31536000, immutable"
+        return {"ETag": quote_etag(etag), "Cache-Control": cache_control}
+
+    def _hash(self, value):
+        return hashlib.sha256(value.encode()).hexdigest()
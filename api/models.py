@@ -3,6 +3,9 @@ from django.contrib.auth.models import User
 # Create your models here.
 
 
+TERMINAL_STATES = ['SUCCEEDED', 'FAILED']
+
+
 
 
 class Experiment(models.Model):
@@ -14,7 +17,7 @@ class Experiment(models.Model):
     simulation_time = models.IntegerField(help_text="Simulation time in nanoseconds")
     smile=models.CharField(max_length=1000)
     created_at = models.DateTimeField(auto_now_add=True)
-    batch_job_id=models.CharField(max_length=100, null=True, blank=True)
+    batch_job_id=models.CharField(max_length=100, null=True, blank=True, db_index=True)
 
     batch_status = models.CharField(max_length=50, null=True, blank=True)
     batch_status_reason = models.TextField(null=True, blank=True)
@@ -22,6 +25,88 @@ class Experiment(models.Model):
     batch_started_at = models.DateTimeField(null=True, blank=True)
     batch_stopped_at = models.DateTimeField(null=True, blank=True)
     batch_status_updated_at = models.DateTimeField(null=True, blank=True)
+    # Taken from StatusSequence whenever the batch status changes; the cursor
+    # of /api/experiments/stream/.
+    status_version = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='experiment_user_created_idx'),
+            models.Index(fields=['user', 'batch_status'], name='experiment_user_status_idx'),
+            models.Index(fields=['user', 'status_version'], name='experiment_user_version_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ResultManifest(models.Model):
+    experiment = models.OneToOneField(Experiment, on_delete=models.CASCADE, related_name='result_manifest')
+    bucket = models.CharField(max_length=255)
+    prefix = models.CharField(max_length=1024)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"s3://{self.bucket}/{self.prefix}"
+
+
+class ResultArtifact(models.Model):
+    CATEGORY_CHOICES = [
+        ('reports', 'Reports'),
+        ('visualizations', 'Visualizations'),
+        ('recommended_structures', 'Recommended structures'),
+    ]
+
+    manifest = models.ForeignKey(ResultManifest, on_delete=models.CASCADE, related_name='artifacts')
+    key = models.CharField(max_length=1024)
+    size = models.BigIntegerField()
+    etag = models.CharField(max_length=100)
+    category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['manifest', 'key'], name='result_artifact_unique_key'),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class BatchSubmission(models.Model):
+    """
+    Outbox row for an experiment's Batch job, written in the same transaction
+    as the experiment and drained by `manage.py submit_batch_jobs`.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SUBMITTED', 'Submitted'),
+        ('FAILED', 'Failed'),
+    ]
+
+    experiment = models.OneToOneField(Experiment, on_delete=models.CASCADE, related_name='batch_submission')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='batch_submission_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.experiment_id} ({self.status})"
+
+
+class StatusSequence(models.Model):
+    """
+    Single-row counter behind Experiment.status_version. Incrementing it
+    inside the transaction that saves a status change locks the row until
+    commit, so versions become visible in order.
+    """
+    value = models.BigIntegerField(default=0)
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return str(self.value)
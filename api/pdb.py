@@ -0,0 +1,98 @@
+from collections import namedtuple
+
+
+PdbPartition = namedtuple("PdbPartition", ["atom", "hetatm", "other"])
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def partition_pdb_records(stream, chunk_size=READ_CHUNK_SIZE):
+    """
+    Split a PDB byte stream into ATOM, HETATM and other records in a single
+    pass. ``stream`` is anything with ``read(n)``, e.g. an S3 StreamingBody.
+    Each part is a bytearray of newline-terminated records in file order.
+    """
+    parts = PdbPartition(bytearray(), bytearray(), bytearray())
+    remainder = b""
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+        for line in lines:
+            _append_record(parts, line)
+
+    if remainder:
+        _append_record(parts, remainder)
+
+    return parts
+
+
+def _append_record(parts, line):
+    if line.endswith(b"\r"):
+        line = line[:-1]
+
+    if line.startswith(b"ATOM"):
+        target = parts.atom
+    elif line.startswith(b"HETATM"):
+        target = parts.hetatm
+    else:
+        target = parts.other
+    target += line
+    target += b"\n"
+
+
+def read_ordered_pdb(stream, chunk_size=READ_CHUNK_SIZE):
+    """
+    Read a PDB stream and return its text with ATOM records first, then
+    HETATM, then everything else, newline-joined without a trailing newline.
+    """
+    parts = partition_pdb_records(stream, chunk_size)
+
+    # Reuse the ATOM buffer for the ordered output instead of joining copies.
+    ordered = parts.atom
+    ordered += parts.hetatm
+    ordered += parts.other
+    if not ordered:
+        return ""
+    return str(memoryview(ordered)[:-1], "utf-8")
+
+
+PdbSummary = namedtuple("PdbSummary", ["records", "atoms", "hetatms", "chains", "malformed"])
+
+
+def scan_pdb_records(data):
+    """
+    Summarise PDB ``data`` (bytes of whole records) without building a
+    structure: record, ATOM and HETATM counts, chain IDs, and the number of
+    coordinate records whose fixed-width x/y/z columns don't parse.
+    """
+    records = atoms = hetatms = malformed = 0
+    chains = set()
+
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        records += 1
+
+        if line.startswith(b"ATOM"):
+            atoms += 1
+        elif line.startswith(b"HETATM"):
+            hetatms += 1
+        else:
+            continue
+
+        try:
+            float(line[30:38])
+            float(line[38:46])
+            float(line[46:54])
+        except ValueError:
+            malformed += 1
+            continue
+        chain = line[21:22].strip()
+        if chain:
+            chains.add(chain.decode("ascii", "replace"))
+
+    return PdbSummary(records, atoms, hetatms, sorted(chains), malformed)
@@ -0,0 +1,15 @@
+import hmac
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+class HasBatchEventsToken(BasePermission):
+    """
+    Shared-secret check for machine-to-machine event ingestion, e.g. an
+    EventBridge API destination configured to send ``X-Batch-Events-Token``.
+    """
+
+    def has_permission(self, request, view):
+        expected = settings.BATCH_EVENTS_TOKEN
+        provided = request.headers.get("X-Batch-Events-Token", "")
+        return bool(expected) and hmac.compare_digest(provided.encode(), expected.encode())
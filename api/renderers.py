@@ -0,0 +1,18 @@
+import json
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets DRF content negotiation accept ``Accept: text/event-stream``. The
+    stream itself is a StreamingHttpResponse and never reaches render();
+    what does is error responses (401, 400), sent as an SSE error event.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or isinstance(data, (bytes, str)):
+            return data
+        return f"event: error\ndata: {json.dumps(data)}\n\n".encode(self.charset)
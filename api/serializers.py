@@ -8,6 +8,15 @@ class ExperimentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Experiment
         fields = ['name', 'id', 'description', 'simulation_time', 'status','smile']
+
+    def __init__(self, *args, **kwargs):
+        # Optional sparse fieldset, e.g. fields=['id', 'status'].
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
     
     def get_status(self, obj):
         if not obj.batch_status:
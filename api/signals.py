@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import invalidate_token, invalidate_user_tokens
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def drop_cached_token(sender, instance, **kwargs):
+    # dj_rest_auth's logout deletes the token; rotation deletes and recreates it.
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    # Covers deactivation as well as any other change to the cached user.
+    invalidate_user_tokens(instance.pk)
+
+
+@receiver(user_logged_out)
+def drop_cached_tokens_on_logout(sender, user, **kwargs):
+    if user is not None:
+        invalidate_user_tokens(user.pk)
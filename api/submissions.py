@@ -0,0 +1,197 @@
+import base64
+import json
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from api.models import BatchSubmission, Experiment
+from .aws_clients import get_batch_client
+from .batch_status import next_status_version
+
+
+logger = logging.getLogger(__name__)
+
+
+JOB_QUEUE = "cmd-t4-queue"
+JOB_DEFINITION = "cmd-standalone-airawat-job-definition:1"
+
+
+def job_name(experiment):
+    # Stable per experiment, so a retried submission can find its earlier job.
+    return f"cmd-exp-{experiment.id}"
+
+
+def results_path(experiment):
+    return f"airawat/traj_analysis/exp_{experiment.id}"
+
+
+def create_experiment(**fields):
+    """
+    Create an experiment together with its pending BatchSubmission, so every
+    experiment either gets a job eventually or never existed.
+    """
+    with transaction.atomic():
+        experiment = Experiment.objects.create(**fields)
+        experiment.results_folder_s3_url = f"s3://medvolt-cmd-standalone-test/{results_path(experiment)}"
+        experiment.save(update_fields=["results_folder_s3_url"])
+        BatchSubmission.objects.create(experiment=experiment, next_attempt_at=timezone.now())
+    return experiment
+
+
+def claim_due_submissions(limit):
+    """
+    Lease up to ``limit`` due submissions by pushing their next attempt past
+    BATCH_SUBMISSION_LEASE and counting the attempt. Rows locked by another
+    worker are skipped where the database supports it; everywhere else
+    (SQLite) claim_submission makes sure each row goes to one worker only.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.BATCH_SUBMISSION_LEASE)
+    with transaction.atomic():
+        candidates = list(
+            BatchSubmission.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='PENDING', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', 'attempts')[:limit]
+        )
+        ids = [
+            submission_id for submission_id, attempts in candidates
+            if claim_submission(submission_id, attempts, now, lease_until)
+        ]
+    return list(BatchSubmission.objects.filter(id__in=ids).select_related('experiment'))
+
+
+def claim_submission(submission_id, attempts, now, lease_until):
+    """
+    Compare-and-set on the attempt count read with the candidate: a worker
+    that read the same row before another one claimed it updates nothing
+    and leaves the row alone. Returns whether this worker got the row.
+    """
+    return BatchSubmission.objects.filter(
+        id=submission_id, status='PENDING', attempts=attempts, next_attempt_at__lte=now,
+    ).update(attempts=attempts + 1, next_attempt_at=lease_until) == 1
+
+
+def process_submissions(limit=None):
+    """
+    Submit one batch of due outbox rows concurrently and record the outcome.
+    Returns (submitted, failed) counts; failures are retried with backoff
+    until BATCH_SUBMISSION_MAX_ATTEMPTS.
+    """
+    submissions = claim_due_submissions(limit or settings.BATCH_SUBMISSION_BATCH_SIZE)
+    if not submissions:
+        return 0, 0
+
+    batch_client = get_batch_client()
+    workers = min(settings.BATCH_SUBMISSION_WORKERS, len(submissions))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(submit_experiment_job, batch_client, submission)
+            for submission in submissions
+        ]
+        outcomes = []
+        for submission, future in zip(submissions, futures):
+            try:
+                outcomes.append((submission, future.result(), None))
+            except Exception as e:
+                logger.error("Error submitting batch job for experiment %s: %s", submission.experiment_id, e)
+                outcomes.append((submission, None, e))
+
+    save_submission_outcomes(outcomes)
+    return (
+        sum(1 for _, job_id, _ in outcomes if job_id),
+        sum(1 for _, job_id, _ in outcomes if not job_id),
+    )
+
+
+def submit_experiment_job(batch_client, submission):
+    experiment = submission.experiment
+    name = job_name(experiment)
+
+    if submission.attempts > 1:
+        # An earlier attempt may have reached Batch before its worker died.
+        existing = find_submitted_job(batch_client, name)
+        if existing:
+            return existing
+
+    payload = {
+        "simulation_time": experiment.simulation_time,
+        "s3_bucket": settings.AWS_STORAGE_BUCKET_NAME,
+        "s3_input_pdb_file_key": experiment.pdb_file_url,
+        "s3_output_path": results_path(experiment),
+        "smile": experiment.smile,
+    }
+    base64_payload = base64.b64encode(json.dumps(payload).encode()).decode()
+
+    response = batch_client.submit_job(
+        jobName=name,
+        jobQueue=JOB_QUEUE,
+        jobDefinition=JOB_DEFINITION,
+        containerOverrides={
+            "command": [
+               base64_payload
+            ]
+        }
+    )
+    return response["jobId"]
+
+
+def find_submitted_job(batch_client, name):
+    response = batch_client.list_jobs(
+        jobQueue=JOB_QUEUE,
+        filters=[{"name": "JOB_NAME", "values": [name]}],
+    )
+    jobs = [job for job in response.get("jobSummaryList", []) if job.get("jobName") == name]
+    if not jobs:
+        return None
+    return max(jobs, key=lambda job: job.get("createdAt", 0))["jobId"]
+
+
+def save_submission_outcomes(outcomes):
+    now = timezone.now()
+    submissions = []
+    experiments = []
+
+    for submission, job_id, error in outcomes:
+        experiment = submission.experiment
+        if job_id:
+            submission.status = 'SUBMITTED'
+            submission.submitted_at = now
+            submission.last_error = None
+            experiment.batch_job_id = job_id
+            experiments.append(experiment)
+        else:
+            submission.last_error = str(error)
+            if submission.attempts >= settings.BATCH_SUBMISSION_MAX_ATTEMPTS:
+                submission.status = 'FAILED'
+                experiment.batch_status = 'FAILED'
+                experiment.batch_status_reason = f"Job submission failed: {error}"
+                experiment.batch_status_updated_at = now
+                experiments.append(experiment)
+            else:
+                submission.next_attempt_at = now + retry_delay(submission.attempts)
+        submissions.append(submission)
+
+    with transaction.atomic():
+        BatchSubmission.objects.bulk_update(
+            submissions, ['status', 'submitted_at', 'last_error', 'next_attempt_at']
+        )
+        failed = [exp for exp in experiments if exp.batch_status == 'FAILED']
+        if failed:
+            version = next_status_version()
+            for experiment in failed:
+                experiment.status_version = version
+        Experiment.objects.bulk_update(
+            experiments,
+            ['batch_job_id', 'batch_status', 'batch_status_reason', 'batch_status_updated_at', 'status_version'],
+        )
+
+
+def retry_delay(attempts):
+    # Capped exponential backoff with jitter so throttled rows spread out.
+    ceiling = min(settings.BATCH_SUBMISSION_RETRY_BASE * 2 ** attempts, settings.BATCH_SUBMISSION_RETRY_MAX)
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
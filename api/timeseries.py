@@ -0,0 +1,89 @@
+import numpy as np
+
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+
+
+def downsample_series(x, y, points=None, x_min=None, x_max=None, method="lttb"):
+    """
+    Restrict a time series to [x_min, x_max] and reduce it to about
+    ``points`` samples while keeping the visual shape of the curve.
+    Returns the selected (x, y) arrays in their original dtype.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+
+    if x_min is not None or x_max is not None:
+        mask = np.ones(len(x), dtype=bool)
+        if x_min is not None:
+            mask &= x >= x_min
+        if x_max is not None:
+            mask &= x <= x_max
+        x = x[mask]
+        y = y[mask]
+
+    if points is None or len(x) <= points:
+        return x, y
+
+    if method == "minmax":
+        indices = minmax_indices(y, points)
+    else:
+        indices = lttb_indices(x, y, points)
+    return x[indices], y[indices]
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of the points to keep."""
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:n_out])
+
+    x = x.astype(np.float64, copy=False)
+    y = y.astype(np.float64, copy=False)
+
+    # Interior points are split into n_out - 2 buckets; first and last are always kept.
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i == n_out - 3:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        else:
+            next_end = edges[i + 2]
+            avg_x = x[end:next_end].mean()
+            avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+
+    return indices
+
+
+def minmax_indices(y, n_out):
+    """Indices of the min and max of each of n_out // 2 equal-size buckets."""
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    size = -(-n // n_buckets)
+
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    valid = ~np.isnan(buckets).all(axis=1)
+
+    offsets = np.arange(n_buckets)[valid] * size
+    mins = offsets + np.nanargmin(buckets[valid], axis=1)
+    maxs = offsets + np.nanargmax(buckets[valid], axis=1)
+
+    return np.unique(np.concatenate(([0, n - 1], mins, maxs)))
@@ -0,0 +1,125 @@
+import math
+import os
+import re
+import uuid
+from django.conf import settings
+from .aws_clients import get_s3_client
+
+
+INPUT_KEY_PREFIX = "airawat-backend/cmd/inputs/"
+
+# S3 multipart limits: every part but the last must be at least 5 MiB, an
+# upload has at most 10,000 parts and an object at most 5 TiB.
+MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024
+MULTIPART_MAX_PARTS = 10000
+MULTIPART_MAX_OBJECT_SIZE = 5 * 1024 ** 4
+
+
+def new_input_key(filename=None):
+    # filename comes straight from the request body; anything but a string is ignored.
+    if not isinstance(filename, str):
+        filename = ""
+    extension = os.path.splitext(filename)[1].lower()
+    if not re.fullmatch(r"\.[a-z0-9]{1,10}", extension):
+        extension = ".pdb"
+    return f"{INPUT_KEY_PREFIX}{uuid.uuid4()}{extension}"
+
+
+def is_input_key(key):
+    return isinstance(key, str) and key.startswith(INPUT_KEY_PREFIX) and ".." not in key
+
+
+def get_part_layout(size):
+    """
+    Part size and count for an object of ``size`` bytes: the configured part
+    size, grown in whole MiB when the object would otherwise need more than
+    MULTIPART_MAX_PARTS parts.
+    """
+    part_size = max(settings.MULTIPART_UPLOAD_PART_SIZE, MULTIPART_MIN_PART_SIZE)
+    if size > part_size * MULTIPART_MAX_PARTS:
+        mib = 1024 * 1024
+        part_size = math.ceil(size / MULTIPART_MAX_PARTS / mib) * mib
+    return part_size, max(math.ceil(size / part_size), 1)
+
+
+def create_multipart_upload(key, content_type="chemical/x-pdb"):
+    response = get_s3_client().create_multipart_upload(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=key,
+        ContentType=content_type,
+    )
+    return response["UploadId"]
+
+
+def presign_upload_parts(key, upload_id, part_numbers, expires=3600):
+    # Signing is local, so a whole batch of part URLs costs no S3 round trips.
+    s3 = get_s3_client()
+    return [
+        {
+            "part_number": part_number,
+            "url": s3.generate_presigned_url(
+                ClientMethod="upload_part",
+                Params={
+                    "Bucket": settings.AWS_STORAGE_BUCKET_NAME,
+                    "Key": key,
+                    "UploadId": upload_id,
+                    "PartNumber": part_number,
+                },
+                ExpiresIn=expires,
+            ),
+        }
+        for part_number in part_numbers
+    ]
+
+
+def list_uploaded_parts(key, upload_id):
+    s3 = get_s3_client()
+    parts = []
+    marker = 0
+    while True:
+        response = s3.list_parts(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=key,
+            UploadId=upload_id,
+            PartNumberMarker=marker,
+        )
+        parts.extend(
+            {
+                "part_number": part["PartNumber"],
+                "etag": part["ETag"],
+                "size": part["Size"],
+            }
+            for part in response.get("Parts", [])
+        )
+        if not response.get("IsTruncated"):
+            return parts
+        marker = response["NextPartNumberMarker"]
+
+
+def complete_multipart_upload(key, upload_id, parts=None):
+    """
+    Assemble the upload from ``parts`` (dicts with part_number and etag, as
+    reported by the client) or, when omitted, from whatever S3 has received.
+    """
+    if parts is None:
+        parts = list_uploaded_parts(key, upload_id)
+
+    get_s3_client().complete_multipart_upload(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={
+            "Parts": [
+                {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                for part in sorted(parts, key=lambda part: part["part_number"])
+            ]
+        },
+    )
+
+
+def abort_multipart_upload(key, upload_id):
+    get_s3_client().abort_multipart_upload(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=key,
+        UploadId=upload_id,
+    )
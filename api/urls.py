@@ -1,5 +1,5 @@
 from django.urls import path,include
-from . import views
+from . import views, async_views
 from django.views.decorators.csrf import csrf_exempt
 
 
@@ -8,13 +8,26 @@ urlpatterns = [
     path('auth/', include('dj_rest_auth.urls')),
     path('auth/register/', include('dj_rest_auth.registration.urls')),
     path('experiments/', csrf_exempt(views.ExperimentAPIView.as_view()), name='experiments'),
+    path('experiments/stream/', csrf_exempt(views.ExperimentStatusStreamAPIView.as_view()), name='experiments-stream'),
+    path('experiments/<int:experiment_id>/dashboard/', csrf_exempt(views.ExperimentDashboardAPIView.as_view()), name='experiment-dashboard'),
     path('experiment-results/<int:experiment_id>/', csrf_exempt(views.ExperimentResultsAPIView.as_view()), name='experiment-results'),
     path('experiment-recommend-structures/<int:experiment_id>/', csrf_exempt(views.ExperimentRecommendStructuresAPIView.as_view()), name='experiment-recommend-structures'),
+    path('experiment-recommend-structures/<int:experiment_id>/<str:filename>/', csrf_exempt(views.ExperimentRecommendStructureDataAPIView.as_view()), name='experiment-recommend-structure-data'),
+    path('batch-events/', csrf_exempt(views.BatchJobEventsAPIView.as_view()), name='batch-events'),
     path('generate-presigned-url', csrf_exempt(views.PresignUploadView.as_view()), name='generate-presigned-url'),
+    path('uploads/multipart/', csrf_exempt(views.MultipartUploadView.as_view()), name='multipart-upload'),
+    path('uploads/multipart/parts/', csrf_exempt(views.MultipartUploadPartsView.as_view()), name='multipart-upload-parts'),
+    path('uploads/multipart/complete/', csrf_exempt(views.MultipartUploadCompleteView.as_view()), name='multipart-upload-complete'),
+    path('uploads/multipart/abort/', csrf_exempt(views.MultipartUploadAbortView.as_view()), name='multipart-upload-abort'),
     path('experiment-gyration-radius/<int:experiment_id>/', csrf_exempt(views.ExperimentGyrationRadiusAPIView.as_view()), name='experiment-gyration-radius'),
     path('experiment-rmsd/<int:experiment_id>/', csrf_exempt(views.ExperimentRMSDAPIView.as_view()), name='experiment-rmsd'),
     path('experiment-cmd-output/<int:experiment_id>/', csrf_exempt(views.ExperimentCMDOutput.as_view()), name='experiment-rmsd'),
 
-
+    # Async variants of the result endpoints; only non-blocking when served over ASGI.
+    path('async/experiment-results/<int:experiment_id>/', csrf_exempt(async_views.experiment_results), name='async-experiment-results'),
+    path('async/experiment-recommend-structures/<int:experiment_id>/', csrf_exempt(async_views.experiment_recommend_structures), name='async-experiment-recommend-structures'),
+    path('async/experiment-gyration-radius/<int:experiment_id>/', csrf_exempt(async_views.experiment_gyration_radius), name='async-experiment-gyration-radius'),
+    path('async/experiment-rmsd/<int:experiment_id>/', csrf_exempt(async_views.experiment_rmsd), name='async-experiment-rmsd'),
+    path('async/experiment-cmd-output/<int:experiment_id>/', csrf_exempt(async_views.experiment_cmd_output), name='async-experiment-cmd-output'),
+    path('async/experiments/stream/', csrf_exempt(async_views.experiment_status_stream), name='async-experiments-stream'),
 ]
-
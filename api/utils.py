@@ -1,13 +1,25 @@
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import logging
+import os
 from .aws_clients import get_s3_client
+from .caches import get_blob_cache, get_trajectory_store, get_visualization_cache, presign_get_url
+from .pdb import read_ordered_pdb
+from .timeseries import downsample_series
 from django.conf import settings
 import py3Dmol
 from typing import Dict, Any
+import numpy as np
 import pandas as pd
-from io import StringIO
+from io import BytesIO, StringIO
 from typing import Dict, Any
 
 
+logger = logging.getLogger(__name__)
+
+
 def parse_s3_uri(s3_uri: str):
    
     parsed = urlparse(s3_uri)
@@ -23,25 +35,53 @@ def parse_s3_uri(s3_uri: str):
 
     return bucket, key
 
-def get_result_urls(s3_uri, expires=3600):
+REPORT_FILES = {
+    "analysis_summary.txt",
+    "simulation_recommendations.txt",
+    "model_selection_report.txt"
+}
+
+VISUALIZATION_FILES = {
+    "cvs_projections.png",
+    "cvs_timeseries.png",
+    "free_energy_surface.png",
+    "metastable_states.png",
+    "model_performance_metrics.png",
+    "training_validation_curves.png"
+}
+
+
+def list_s3_objects(bucket, prefix):
     s3 = get_s3_client()
-    bucket, prefix = parse_s3_uri(s3_uri)
     paginator = s3.get_paginator("list_objects_v2")
-    
-    report_files = {
-        "analysis_summary.txt",
-        "simulation_recommendations.txt",
-        "model_selection_report.txt"
-    }
-    
-    visualization_files = {
-        "cvs_projections.png",
-        "cvs_timeseries.png",
-        "free_energy_surface.png",
-        "metastable_states.png",
-        "model_performance_metrics.png",
-        "training_validation_curves.png"
-    }
+
+    objects = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            objects.append({
+                "key": obj["Key"],
+                "size": obj["Size"],
+                "etag": obj["ETag"].strip('"'),
+            })
+    return objects
+
+
+def classify_result_key(key):
+    filename = key.split("/")[-1]
+
+    if filename in REPORT_FILES:
+        return "reports"
+    if filename in VISUALIZATION_FILES:
+        return "visualizations"
+    if "recommended_structures/" in key and key.endswith(".pdb"):
+        return "recommended_structures"
+    return None
+
+
+def get_result_urls(s3_uri, expires=3600, objects=None):
+    bucket, prefix = parse_s3_uri(s3_uri)
+    if objects is None:
+        objects = list_s3_objects(bucket, prefix)
     
     results = {
         "reports": [],
@@ -49,98 +89,183 @@ def get_result_urls(s3_uri, expires=3600):
         "recommended_structures": []
     }
     
-    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-        for obj in page.get("Contents", []):
-            key = obj["Key"]
-            filename = key.split("/")[-1]
-            
-            url = s3.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": bucket, "Key": key},
-                ExpiresIn=expires,
-            )
-            
-            item = {"key": key, "url": url}
-            
-            if filename in report_files:
-                results["reports"].append(item)
-            elif filename in visualization_files:
-                results["visualizations"].append(item)
-            elif "recommended_structures/" in key and key.endswith(".pdb"):
-                name = filename 
-                item["name"] = name
-                results["recommended_structures"].append(item)
+    for obj in objects:
+        key = obj["key"]
+        category = obj.get("category") or classify_result_key(key)
+        if category is None:
+            continue
+        
+        url = presign_get_url(bucket, key, expires)
+        
+        item = {"key": key, "url": url}
+        
+        if category == "recommended_structures":
+            item["name"] = key.split("/")[-1]
+        results[category].append(item)
     
     return results
 
 
-def get_recommended_structures_with_viz(s3_uri, expires=3600):
-    s3 = get_s3_client()
+def get_recommended_structures_with_viz(s3_uri, expires=3600, objects=None):
     bucket, prefix = parse_s3_uri(s3_uri)
-    paginator = s3.get_paginator("list_objects_v2")
+    if objects is None:
+        objects = list_s3_objects(bucket, prefix)
     
-    recommended_structures = []
+    structures = _recommended_structure_objects(objects)
+    return _map_concurrently(
+        lambda obj: _fetch_recommended_structure(bucket, obj, expires),
+        structures,
+    )
+
+
+def get_recommended_structures_compact(s3_uri, expires=3600, objects=None, include_data=False, data_url=None):
+    """
+    Compact alternative to get_recommended_structures_with_viz: the viewer
+    template and style are sent once, and each structure carries either its
+    ordered PDB text (include_data) or a data_url to fetch it lazily.
+    """
+    bucket, prefix = parse_s3_uri(s3_uri)
+    if objects is None:
+        objects = list_s3_objects(bucket, prefix)
     
-    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-        for obj in page.get("Contents", []):
-            key = obj["Key"]
-            
-            if "recommended_structures/" in key and key.endswith(".pdb"):
-                url = s3.generate_presigned_url(
-                    "get_object",
-                    Params={"Bucket": bucket, "Key": key},
-                    ExpiresIn=expires,
-                )
-                
-                try:
-                    response = s3.get_object(Bucket=bucket, Key=key)
-                    pdb_data = response['Body'].read().decode('utf-8')
-                    
-                    html_content = generate_pdb_visualization(pdb_data)
-                    
-                    recommended_structures.append({
-                        "key": key,
-                        "filename": key.split("/")[-1],
-                        "url": url,
-                        "visualization_html": html_content
-                    })
-                    
-                except Exception as e:
-                    recommended_structures.append({
-                        "key": key,
-                        "filename": key.split("/")[-1],
-                        "url": url,
-                        "visualization_html": None,
-                        "error": str(e)
-                    })
-    
-    return recommended_structures
+    def build_item(obj):
+        key = obj["key"]
+        filename = key.split("/")[-1]
+        item = {
+            "key": key,
+            "filename": filename,
+            "url": presign_get_url(bucket, key, expires),
+        }
+        if data_url is not None:
+            item["data_url"] = data_url(filename)
+        if include_data:
+            try:
+                item["pdb_data"] = get_recommended_structure_data(bucket, key, obj.get("etag"))
+            except Exception as e:
+                item["pdb_data"] = None
+                item["error"] = str(e)
+        return item
+    
+    return {
+        "viewer": {
+            "template": VIEWER_TEMPLATE,
+            "style": VISUALIZATION_STYLE,
+        },
+        "structures": _map_concurrently(build_item, _recommended_structure_objects(objects)),
+    }
 
 
-def generate_pdb_visualization(pdb_data):
-    lines = pdb_data.splitlines()
-    atom_lines = [line for line in lines if line.startswith("ATOM")]
-    hetatm_lines = [line for line in lines if line.startswith("HETATM")]
-    other_lines = [
-        line
-        for line in lines
-        if not (line.startswith("ATOM") or line.startswith("HETATM"))
+def get_recommended_structure_data(bucket, key, etag=None):
+    with open_s3_object(bucket, key, etag) as body:
+        return read_ordered_pdb(body)
+
+
+def _recommended_structure_objects(objects):
+    return [
+        obj for obj in objects
+        if "recommended_structures/" in obj["key"] and obj["key"].endswith(".pdb")
     ]
-    ordered_lines = atom_lines + hetatm_lines + other_lines
-    ordered_data = "\n".join(ordered_lines)
+
+
+def _map_concurrently(func, items):
+    if not items:
+        return []
     
-    view = py3Dmol.view(width=800, height=600)
-    view.addModel(ordered_data, "pdb")
+    # Threads share the pooled S3 client, so keep the pool within its connection limit.
+    workers = min(settings.RECOMMENDED_STRUCTURES_WORKERS, len(items))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, items))
+
+
+def _fetch_recommended_structure(bucket, obj, expires):
+    s3 = get_s3_client()
+    key = obj["key"]
+    url = presign_get_url(bucket, key, expires)
+    viz_cache = get_visualization_cache()
     
-    view.setStyle(
-        {"model": 0, "and": [{"atom": "C", "invert": True}]},
-        {"cartoon": {"color": "spectrum"}},
+    try:
+        html_content = None
+        if obj.get("etag"):
+            html_content = viz_cache.get(visualization_cache_key(obj["etag"]))
+        
+        if html_content is None:
+            etag = obj.get("etag") or s3.head_object(Bucket=bucket, Key=key)["ETag"].strip('"')
+            with open_s3_object(bucket, key, etag) as body:
+                ordered_data = read_ordered_pdb(body)
+            
+            html_content = render_pdb_visualization(ordered_data)
+            viz_cache.set(visualization_cache_key(etag), html_content)
+        
+        return {
+            "key": key,
+            "filename": key.split("/")[-1],
+            "url": url,
+            "visualization_html": html_content
+        }
+        
+    except Exception as e:
+        return {
+            "key": key,
+            "filename": key.split("/")[-1],
+            "url": url,
+            "visualization_html": None,
+            "error": str(e)
+        }
+
+
+VISUALIZATION_STYLE = {
+    "width": 800,
+    "height": 600,
+    "styles": [
+        (
+            {"model": 0, "and": [{"atom": "C", "invert": True}]},
+            {"cartoon": {"color": "spectrum"}},
+        ),
+        (
+            {"model": 0, "and": [{"hetflag": True}]},
+            {"stick": {"colorscheme": "greenCarbon"}},
+        ),
+    ],
+}
+
+
+def visualization_cache_key(etag, style=VISUALIZATION_STYLE):
+    # Style is part of the key so changing the viewer invalidates old renders.
+    style_json = json.dumps(style, sort_keys=True)
+    return hashlib.sha256(f"{etag}:{style_json}".encode()).hexdigest()
+
+
+# Standalone 3Dmol loader for the compact response mode: the frontend includes
+# it once and calls renderStructure(element, pdbData, style) per structure.
+VIEWER_TEMPLATE = """<script src="https://cdn.jsdelivr.net/npm/3dmol@%s/build/3Dmol-min.js"></script>
+<script>
+function renderStructure(element, pdbData, style) {
+  var viewer = $3Dmol.createViewer(element, {backgroundColor: "white"});
+  viewer.addModel(pdbData, "pdb");
+  style.styles.forEach(function (s) { viewer.setStyle(s[0], s[1]); });
+  viewer.zoomTo();
+  viewer.render();
+  return viewer;
+}
+</script>""" % py3Dmol.__version__
+
+
+def order_pdb_records(pdb_data):
+    return read_ordered_pdb(BytesIO(pdb_data.encode("utf-8")))
+
+
+def generate_pdb_visualization(pdb_data):
+    return render_pdb_visualization(order_pdb_records(pdb_data))
+
+
+def render_pdb_visualization(ordered_data):
+    view = py3Dmol.view(
+        width=VISUALIZATION_STYLE["width"], height=VISUALIZATION_STYLE["height"]
     )
+    view.addModel(ordered_data, "pdb")
     
-    view.setStyle(
-        {"model": 0, "and": [{"hetflag": True}]},
-        {"stick": {"colorscheme": "greenCarbon"}},
-    )
+    for selection, style in VISUALIZATION_STYLE["styles"]:
+        view.setStyle(selection, style)
     
     view.zoomTo()
     
@@ -148,58 +273,196 @@ def generate_pdb_visualization(pdb_data):
 
 
 
-def fetch_gyration_radius(s3_uri: str) -> Dict[str, Any]:
+def fetch_gyration_radius(s3_uri: str, points=None, x_min=None, x_max=None, method="lttb", etag=None) -> Dict[str, Any]:
     try:
-        uri_parts = s3_uri.replace("s3://", "").split("/", 1)
-        bucket = uri_parts[0]
-        key = uri_parts[1]
-        
-        s3 = get_s3_client()
-        response = s3.get_object(Bucket=bucket, Key=key)
-        csv_content = response['Body'].read().decode('utf-8')
-        
-        df = pd.read_csv(StringIO(csv_content))
-        
-        if df.empty or 'x' not in df.columns or 'y' not in df.columns:
-            print("error")
-            return {}
-        
-        return {
-            "x": df["x"].tolist(),
-            "y": df["y"].tolist()
-        }
-        
+        return get_series(s3_uri, points=points, x_min=x_min, x_max=x_max, method=method, etag=etag)
     except Exception as e:
-        print(f"Error fetching gyration radius data: {e}")
+        logger.error("Error fetching gyration radius data from %s: %s", s3_uri, e)
         return {}
+
+
+def get_series(s3_uri, points=None, x_min=None, x_max=None, method="lttb", etag=None):
+    """
+    Like fetch_gyration_radius, but raises instead of returning {} so callers
+    can report what went wrong.
+    """
+    bucket, key = s3_uri.replace("s3://", "").split("/", 1)
+
+    series = load_trajectory_series(bucket, key, etag)
+    if series is None:
+        raise ValueError(f"{key.split('/')[-1]} has no x/y data")
+
+    x, y = downsample_series(
+        series["x"],
+        series["y"],
+        points=points,
+        x_min=x_min,
+        x_max=x_max,
+        method=method,
+    )
+
+    return {
+        "x": x.tolist(),
+        "y": y.tolist()
+    }
+
+
+def load_trajectory_series(bucket, key, etag=None):
+    s3 = get_s3_client()
+    store = get_trajectory_store()
     
+    # A caller-supplied ETag comes from the manifest of a finished job, so the
+    # object is immutable and worth keeping in the blob cache.
+    immutable = etag is not None
+    if etag is None:
+        etag = s3.head_object(Bucket=bucket, Key=key)["ETag"].strip('"')
+    
+    series = store.get(bucket, key, etag)
+    if series is not None:
+        return series
+    
+    series = read_s3_csv_columns(bucket, key, ["x", "y"], etag=etag, cache=immutable)
+    if series is None:
+        return None
+    
+    store.put(bucket, key, etag, series)
+    return series
+
 
-def fetch_cmd_output(s3_uri: str) -> Dict[str, Any]:
+CSV_CHUNK_ROWS = 100_000
+
+
+def read_s3_csv_columns(bucket, key, columns, etag=None, chunksize=CSV_CHUNK_ROWS, cache=True):
+    """
+    Stream a CSV object from S3 straight into the pandas parser, keeping only
+    ``columns`` as NumPy arrays. The raw body is never held in memory as a
+    whole. Returns None if the file is empty or lacks any of the columns.
+    """
+    wanted = set(columns)
+    parts = {column: [] for column in columns}
+    
+    with open_s3_object(bucket, key, etag, cache=cache) as body:
+        reader = pd.read_csv(body, usecols=lambda c: c in wanted, chunksize=chunksize)
+        for chunk in reader:
+            if not wanted.issubset(chunk.columns):
+                return None
+            for column in columns:
+                parts[column].append(chunk[column].to_numpy())
+    
+    if not parts[columns[0]]:
+        return None
+    
+    series = {column: np.concatenate(arrays) for column, arrays in parts.items()}
+    if not len(series[columns[0]]):
+        return None
+    return series
+    
+
+def fetch_cmd_output(s3_uri: str, etag=None) -> Dict[str, Any]:
     try:
-        uri_parts = s3_uri.replace("s3://", "").split("/", 1)
-        bucket = uri_parts[0]
-        key = uri_parts[1]
-        
-        s3 = get_s3_client()
-        response = s3.get_object(Bucket=bucket, Key=key)
-        csv_content = response['Body'].read().decode('utf-8')
-        
-        df = pd.read_csv(StringIO(csv_content))
-        
-        # Validate data
-        if df.empty:
-            print("error")
-            return {}
-        
-        results = {}
-        last_row = df.to_dict("index")
-        
-        for key, value in last_row.items():
-            for k, v in value.items():
-                results[k] = v
-        
-        return results
-        
+        return get_cmd_output(s3_uri, etag=etag)
     except Exception as e:
-        print("Error")
-        return {}
\ No newline at end of file
+        logger.error("Error fetching cmd output from %s: %s", s3_uri, e)
+        return {}
+
+
+def get_cmd_output(s3_uri, etag=None):
+    """
+    Last row of output.csv as a dict. Like fetch_cmd_output, but raises
+    instead of returning {}.
+    """
+    bucket, key = s3_uri.replace("s3://", "").split("/", 1)
+
+    header, last_line = read_csv_header_and_last_line(bucket, key, etag=etag)
+    if last_line is None:
+        raise ValueError(f"{key.split('/')[-1]} has no data rows")
+
+    df = pd.read_csv(StringIO(header + "\n" + last_line))
+    if df.empty:
+        raise ValueError(f"{key.split('/')[-1]} has no data rows")
+
+    return df.to_dict("records")[-1]
+
+
+def read_csv_header_and_last_line(bucket, key, chunk_size=8192, etag=None):
+    """
+    Fetch only the first and last lines of a CSV object with ranged reads.
+    The tail range doubles until it holds a complete last line, so the cost
+    stays flat however many rows precede it. Returns (header, None) when the
+    file has no data rows. Reads come from the blob cache when the object is
+    already there, and from ranged S3 GETs otherwise.
+    """
+    cached_path = get_blob_cache().cached_path(bucket, key, etag) if etag else None
+    if cached_path is not None:
+        with open(cached_path, "rb") as f:
+            return _read_header_and_last_line(_local_range_reader(f), chunk_size)
+    return _read_header_and_last_line(_s3_range_reader(bucket, key), chunk_size)
+
+
+def _s3_range_reader(bucket, key):
+    s3 = get_s3_client()
+    
+    def read_range(byte_range):
+        response = s3.get_object(Bucket=bucket, Key=key, Range=byte_range)
+        size = int(response["ContentRange"].rsplit("/", 1)[1])
+        return response['Body'].read(), size
+    
+    return read_range
+
+
+def _local_range_reader(f):
+    size = os.fstat(f.fileno()).st_size
+    
+    def read_range(byte_range):
+        start, end = byte_range.replace("bytes=", "").split("-")
+        if start:
+            f.seek(int(start))
+            return f.read(int(end) - int(start) + 1), size
+        f.seek(max(size - int(end), 0))
+        return f.read(), size
+    
+    return read_range
+
+
+def _read_header_and_last_line(read_range, chunk_size):
+    head, size = read_range(f"bytes=0-{chunk_size - 1}")
+    
+    while b"\n" not in head and len(head) < size:
+        more, _ = read_range(f"bytes={len(head)}-{len(head) * 2 - 1}")
+        head += more
+    
+    header = head.split(b"\n", 1)[0].rstrip(b"\r")
+    
+    tail = head if len(head) >= size else b""
+    tail_size = chunk_size
+    while True:
+        if len(tail) < size:
+            tail, _ = read_range(f"bytes=-{min(tail_size, size)}")
+        
+        # Blank trailing lines are skipped by pandas, so skip them here too.
+        body = tail.rstrip(b"\r\n")
+        newline = body.rfind(b"\n")
+        if newline != -1 or len(tail) >= size:
+            break
+        tail_size *= 2
+    
+    if newline == -1:
+        # The only non-blank line is the header itself.
+        return header.decode("utf-8"), None
+    
+    last_line = body[newline + 1:].rstrip(b"\r")
+    return header.decode("utf-8"), last_line.decode("utf-8")
+
+
+def open_s3_object(bucket, key, etag=None, cache=True):
+    """
+    Readable binary stream for an S3 object. With a known ETag the object is
+    read through the shared blob cache; without one it is streamed directly.
+    """
+    if etag and cache:
+        return get_blob_cache().open(bucket, key, etag)
+    
+    params = {"Bucket": bucket, "Key": key}
+    if etag:
+        params["IfMatch"] = etag
+    return get_s3_client().get_object(**params)['Body']
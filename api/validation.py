@@ -0,0 +1,126 @@
+import re
+from botocore.exceptions import ClientError
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from .aws_clients import get_s3_client
+from .pdb import scan_pdb_records
+
+
+SMILES_CHARACTERS = re.compile(r"[A-Za-z0-9@+\-\[\]()=#$%/\\.:*]+")
+SMILES_RING_LABEL = re.compile(r"%\d{2}|\d")
+
+MISSING_OBJECT_ERROR_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+def validate_experiment_inputs(pdb_key, smile):
+    """
+    Cheap checks run before a simulation job is submitted: the SMILES string
+    is well-formed and the PDB input exists and starts with parseable ATOM
+    records. Raises ValidationError with every problem found; S3 errors other
+    than a missing key propagate as ClientError or BotoCoreError.
+    """
+    errors = {}
+
+    smile_error = check_smiles(smile)
+    if smile_error:
+        errors["smile"] = smile_error
+
+    pdb_error = check_pdb_input(pdb_key)
+    if pdb_error:
+        errors["pdb_file_url"] = pdb_error
+
+    if errors:
+        raise ValidationError(errors)
+
+
+def check_smiles(smile):
+    """
+    Syntax sanity check, not a chemistry parser: allowed characters, balanced
+    branches and brackets, and every ring-closure label closed.
+    """
+    if not smile or not isinstance(smile, str):
+        return "This field is required."
+    if len(smile) > settings.SMILES_MAX_LENGTH:
+        return f"Expected at most {settings.SMILES_MAX_LENGTH} characters."
+    if not SMILES_CHARACTERS.fullmatch(smile):
+        return "Contains characters that cannot appear in SMILES."
+
+    depth = 0
+    in_bracket = False
+    outside = []
+    for char in smile:
+        if char == "[":
+            if in_bracket:
+                return "Nested '[' in bracket atom."
+            in_bracket = True
+        elif char == "]":
+            if not in_bracket:
+                return "Unmatched ']'."
+            in_bracket = False
+        elif in_bracket:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                return "Unmatched ')'."
+        outside.append(char if not in_bracket else " ")
+
+    if in_bracket:
+        return "Unclosed '['."
+    if depth:
+        return "Unclosed '('."
+    if not re.search(r"[A-Za-z]", smile):
+        return "Contains no atoms."
+
+    # Bracket contents (charges, H counts) are blanked out above, so any digit
+    # left is a ring bond, which must be opened and closed in pairs.
+    open_rings = set()
+    for label in SMILES_RING_LABEL.findall("".join(outside)):
+        open_rings ^= {label}
+    if open_rings:
+        return f"Unclosed ring bond {', '.join(sorted(open_rings))}."
+
+    return None
+
+
+def check_pdb_input(key):
+    """
+    HEAD the uploaded PDB, then read only its first
+    PDB_VALIDATION_SAMPLE_BYTES through scan_pdb_records.
+    """
+    if not key or not isinstance(key, str):
+        return "This field is required."
+
+    s3 = get_s3_client()
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    try:
+        size = s3.head_object(Bucket=bucket, Key=key)["ContentLength"]
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in MISSING_OBJECT_ERROR_CODES:
+            return "No uploaded file at this key."
+        raise
+
+    if size == 0:
+        return "The uploaded file is empty."
+
+    sample_size = settings.PDB_VALIDATION_SAMPLE_BYTES
+    with s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{sample_size - 1}")["Body"] as body:
+        sample = body.read()
+    complete = size <= len(sample)
+    if not complete:
+        # Drop the record cut off by the range.
+        sample = sample[:sample.rfind(b"\n") + 1]
+
+    if b"\0" in sample:
+        return "The uploaded file is not a text PDB file."
+
+    summary = scan_pdb_records(sample)
+    if not summary.atoms and complete:
+        # A long header can push the first ATOM past the sample, so a
+        # truncated read alone is no reason to reject the file.
+        return "No ATOM records found in the file."
+    if summary.malformed:
+        return f"{summary.malformed} ATOM/HETATM records have unreadable coordinates."
+    return None
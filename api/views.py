@@ -1,18 +1,43 @@
 from django.shortcuts import render
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from api.models import Experiment
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from api.serializers import ExperimentSerializer
+from api.pagination import ExperimentCursorPagination
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from api.utils import get_result_urls,get_recommended_structures_with_viz,fetch_gyration_radius,fetch_cmd_output
-from .aws_clients import get_batch_client,get_s3_client
+from api.utils import get_result_urls,get_recommended_structures_with_viz,get_recommended_structures_compact,get_recommended_structure_data,fetch_gyration_radius,fetch_cmd_output,get_series,get_cmd_output,parse_s3_uri
+from api.manifest import get_artifact_etag, get_result_objects
+from api.mixins import ConditionalResultMixin, ResultSpec
+from api.permissions import HasBatchEventsToken
+from api.renderers import EventStreamRenderer
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from api.batch_status import apply_job_state_events, current_status_version, job_event_detail
+from api.timeseries import DOWNSAMPLING_METHODS
+from api.submissions import create_experiment
+from api.validation import validate_experiment_inputs
+from api.uploads import (
+    MULTIPART_MAX_OBJECT_SIZE, MULTIPART_MAX_PARTS, abort_multipart_upload,
+    complete_multipart_upload, create_multipart_upload, get_part_layout,
+    is_input_key, list_uploaded_parts, new_input_key, presign_upload_parts,
+)
+from .aws_clients import get_s3_client
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError, ClientError
+from django.urls import reverse
 from django.conf import settings
 import json
-import base64
-from datetime import datetime, timezone as dt_timezone
+import logging
+import math
+from datetime import datetime, time as dt_time
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+logger = logging.getLogger(__name__)
 
 
 def home(request):
@@ -38,83 +63,194 @@ class PresignUploadView(APIView):
             "upload_url": url,
             "s3_key": key
         })
+
+
+def parse_multipart_upload(data):
+    key = data.get("s3_key")
+    upload_id = data.get("upload_id")
+    errors = {}
+    if not is_input_key(key):
+        errors["s3_key"] = "Expected an s3_key returned when the upload was started."
+    if not upload_id or not isinstance(upload_id, str):
+        errors["upload_id"] = "This field is required."
+    if errors:
+        raise ValidationError(errors)
+    return key, upload_id
+
+
+def parse_part_numbers(value):
+    if not isinstance(value, list) or not value:
+        raise ValidationError({"part_numbers": "Expected a non-empty list of part numbers."})
+    if len(value) > settings.MULTIPART_UPLOAD_MAX_PRESIGN_PARTS:
+        raise ValidationError({
+            "part_numbers": f"At most {settings.MULTIPART_UPLOAD_MAX_PRESIGN_PARTS} parts per request."
+        })
+    if not all(
+        isinstance(n, int) and not isinstance(n, bool) and 1 <= n <= MULTIPART_MAX_PARTS
+        for n in value
+    ):
+        raise ValidationError({"part_numbers": f"Expected integers from 1 to {MULTIPART_MAX_PARTS}."})
+    return sorted(set(value))
+
+
+def parse_completed_parts(value):
+    if value is None:
+        return None
+    try:
+        parts = [{"part_number": int(p["part_number"]), "etag": str(p["etag"])} for p in value]
+    except (TypeError, KeyError, ValueError):
+        raise ValidationError({"parts": "Expected a list of {part_number, etag} objects."})
+    if not parts:
+        raise ValidationError({"parts": "Expected at least one part."})
+    return parts
+
+
+# S3 errors caused by the parts a client reported, e.g. a stale ETag from a
+# resumed upload; the client can fix these by listing the parts again.
+MULTIPART_CLIENT_ERROR_CODES = {"InvalidPart", "InvalidPartOrder", "EntityTooSmall"}
+
+
+def multipart_upload_error(e):
+    error = e.response.get("Error", {})
+    if error.get("Code") == "NoSuchUpload":
+        return Response({"error": "Upload not found"}, status=404)
+    if error.get("Code") in MULTIPART_CLIENT_ERROR_CODES:
+        return Response({"error": error.get("Message") or error["Code"], "code": error["Code"]}, status=400)
+    raise e
+
+
+class MultipartUploadView(APIView):
+    """
+    Start a multipart upload of an input file. The response says how to split
+    the file; part URLs come from MultipartUploadPartsView.
+    """
+
+    def post(self, request):
+        try:
+            size = int(request.data.get("size"))
+            if not 0 < size <= MULTIPART_MAX_OBJECT_SIZE:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise ValidationError({"size": f"Expected a size in bytes up to {MULTIPART_MAX_OBJECT_SIZE}."})
+
+        key = new_input_key(request.data.get("filename"))
+        upload_id = create_multipart_upload(key)
+        part_size, part_count = get_part_layout(size)
+
+        return Response(
+            {
+                "s3_key": key,
+                "upload_id": upload_id,
+                "part_size": part_size,
+                "part_count": part_count,
+            },
+            status=201,
+        )
+
+
+class MultipartUploadPartsView(APIView):
+    """
+    GET lists the parts S3 already has, so an interrupted client can resume;
+    POST presigns upload URLs for a batch of part numbers.
+    """
+
+    def get(self, request):
+        key, upload_id = parse_multipart_upload(request.query_params)
+        try:
+            parts = list_uploaded_parts(key, upload_id)
+        except ClientError as e:
+            return multipart_upload_error(e)
+        return Response({"s3_key": key, "upload_id": upload_id, "parts": parts})
+
+    def post(self, request):
+        key, upload_id = parse_multipart_upload(request.data)
+        part_numbers = parse_part_numbers(request.data.get("part_numbers"))
+        return Response({
+            "s3_key": key,
+            "upload_id": upload_id,
+            "parts": presign_upload_parts(key, upload_id, part_numbers),
+        })
+
+
+class MultipartUploadCompleteView(APIView):
+    def post(self, request):
+        key, upload_id = parse_multipart_upload(request.data)
+        parts = parse_completed_parts(request.data.get("parts"))
+        try:
+            complete_multipart_upload(key, upload_id, parts)
+        except ClientError as e:
+            return multipart_upload_error(e)
+        return Response({"s3_key": key})
+
+
+class MultipartUploadAbortView(APIView):
+    def post(self, request):
+        key, upload_id = parse_multipart_upload(request.data)
+        try:
+            abort_multipart_upload(key, upload_id)
+        except ClientError as e:
+            return multipart_upload_error(e)
+        return Response(status=204)
     
 
+def parse_datetime_param(param, value):
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            date = parse_date(value)
+            if date is not None:
+                parsed = datetime.combine(date, dt_time.min)
+    except ValueError:
+        parsed = None
+
+    if parsed is None:
+        raise ValidationError({param: "Expected an ISO 8601 date or datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 class ExperimentAPIView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        experiments = Experiment.objects.filter(user=request.user)
-        
-        self._update_batch_statuses(experiments)
-        
-        experiments = Experiment.objects.filter(user=request.user)
-        
-        serializer = ExperimentSerializer(experiments, many=True)
-        return Response(serializer.data)
-    
-    def _update_batch_statuses(self, experiments):
-        experiments_to_update = [
-            exp for exp in experiments 
-            if exp.batch_job_id and self._should_update_status(exp)
-        ]
-        
-        if not experiments_to_update:
-            return
-        
-        batch_job_ids = [exp.batch_job_id for exp in experiments_to_update]
-        
-        try:
-            batch_client = get_batch_client()
-            response = batch_client.describe_jobs(jobs=batch_job_ids)
-            
-            jobs_map = {job['jobId']: job for job in response['jobs']}
-            
-            for exp in experiments_to_update:
-                job = jobs_map.get(exp.batch_job_id)
-                if job:
-                    self._update_experiment_status(exp, job)
-                    
-        except Exception as e:
-            print(f"Error fetching batch statuses: {e}")
-    
-    def _should_update_status(self, experiment):
-        if not experiment.batch_status:
-            return True
-        
-        terminal_states = ['SUCCEEDED', 'FAILED']
-        if experiment.batch_status in terminal_states:
-            return False
-        
-        if experiment.batch_status_updated_at:
-            time_since_update = timezone.now() - experiment.batch_status_updated_at
-            return time_since_update.total_seconds() > 30
-        
-        return True
-    
-    def _update_experiment_status(self, experiment, job_data):
-        experiment.batch_status = job_data['status']
-        experiment.batch_status_reason = job_data.get('statusReason', '')
-        
-        if job_data.get('createdAt'):
-            experiment.batch_created_at = self._convert_timestamp(job_data['createdAt'])
-        if job_data.get('startedAt'):
-            experiment.batch_started_at = self._convert_timestamp(job_data['startedAt'])
-        if job_data.get('stoppedAt'):
-            experiment.batch_stopped_at = self._convert_timestamp(job_data['stoppedAt'])
-        
-        experiment.batch_status_updated_at = timezone.now()
-        experiment.save(update_fields=[
-            'batch_status', 
-            'batch_status_reason',
-            'batch_created_at',
-            'batch_started_at',
-            'batch_stopped_at',
-            'batch_status_updated_at'
-        ])
-    
-    def _convert_timestamp(self, timestamp_ms):
-        return datetime.fromtimestamp(timestamp_ms / 1000, tz=dt_timezone.utc)        
+        experiments = self._filter_experiments(
+            Experiment.objects.filter(user=request.user), request.query_params
+        )
+
+        fields = self._get_sparse_fields(request.query_params)
+        paginator = ExperimentCursorPagination()
+        if not paginator.is_requested(request):
+            serializer = ExperimentSerializer(experiments.order_by('id'), many=True, fields=fields)
+            return Response(serializer.data)
+
+        page = paginator.paginate_queryset(experiments, request)
+        serializer = ExperimentSerializer(page, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
+
+    def _filter_experiments(self, experiments, params):
+        statuses = [s for s in params.get('status', '').split(',') if s]
+        if statuses:
+            experiments = experiments.filter(batch_status__in=statuses)
+
+        if params.get('name'):
+            experiments = experiments.filter(name__icontains=params['name'])
+
+        for param, lookup in (
+            ('created_after', 'created_at__gte'),
+            ('created_before', 'created_at__lt'),
+        ):
+            if params.get(param):
+                experiments = experiments.filter(
+                    **{lookup: parse_datetime_param(param, params[param])}
+                )
+
+        return experiments
+
+    def _get_sparse_fields(self, params):
+        if not params.get('fields'):
+            return None
+        return [f.strip() for f in params['fields'].split(',') if f.strip()]
     
 
         # payload = {
@@ -126,110 +262,350 @@ class ExperimentAPIView(APIView):
         # }
 
     def post(self, request):
-        user=request.user
-        experiment=Experiment.objects.create(user=user,smile=request.data.get('smile',''),description=request.data.get('description',''),name=request.data.get('name',''),pdb_file_url=request.data.get('pdb_file_url',''),simulation_time=request.data.get('simulation_time',''))
-
-        batch = get_batch_client()
-        experiment.results_folder_s3_url= f"s3://medvolt-cmd-standalone-test/airawat/traj_analysis/exp_{experiment.id}"
-        experiment.save(update_fields=["results_folder_s3_url"])
-
-        payload = {
-            "simulation_time": experiment.simulation_time,
-            "s3_bucket": settings.AWS_STORAGE_BUCKET_NAME,
-            "s3_input_pdb_file_key": experiment.pdb_file_url,
-            "s3_output_path": f"airawat/traj_analysis/exp_{experiment.id}",
-            "smile": experiment.smile,
-        }
-        base64_payload = base64.b64encode(json.dumps(payload).encode()).decode()
-
-        response = batch.submit_job(
-            jobName=f"cmd-exp-{experiment.id}",
-            jobQueue="cmd-t4-queue",
-            jobDefinition="cmd-standalone-airawat-job-definition:1",
-            containerOverrides={
-                "command": [
-                   base64_payload
-                ]
-            }
-        )
+        # Reject bad inputs here rather than after they have taken a GPU queue slot.
+        try:
+            validate_experiment_inputs(request.data.get('pdb_file_url',''), request.data.get('smile',''))
+        except (ClientError, BotoCoreError) as e:
+            logger.error("Error validating experiment inputs: %s", e)
+            return Response({"error": "Could not validate the input files, please retry."}, status=503)
 
-        experiment.batch_job_id = response["jobId"]
-        experiment.save(update_fields=["batch_job_id"])
+        # The job itself is submitted by `manage.py submit_batch_jobs`, so a slow
+        # or throttled Batch API never holds this request open.
+        experiment = create_experiment(
+            user=request.user,
+            smile=request.data.get('smile',''),
+            description=request.data.get('description',''),
+            name=request.data.get('name',''),
+            pdb_file_url=request.data.get('pdb_file_url',''),
+            simulation_time=request.data.get('simulation_time',''),
+        )
 
         return Response(
             {
                 "experiment_id": experiment.id,
-                "batch_job_id": response["jobId"],
+                "batch_job_id": None,
+                "submission_status": experiment.batch_submission.status,
             },
             status=201,
         )
-        
 
-class ExperimentResultsAPIView(APIView):
+
+class ExperimentResultsAPIView(ConditionalResultMixin, APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, experiment_id):
-        try:
-            experiment = Experiment.objects.get(id=experiment_id, user=request.user)
-            results_folder_s3_url = experiment.results_folder_s3_url
-            result_urls = get_result_urls(results_folder_s3_url)
-            return Response(result_urls)
+    def get_result_spec(self, request, experiment):
+        results_folder_s3_url = experiment.results_folder_s3_url
+        objects = get_result_objects(experiment)
+        return ResultSpec(
+            lambda: get_result_urls(results_folder_s3_url, objects=objects),
+            presigned_keys=[obj["key"] for obj in objects or [] if obj["category"]],
+        )
 
-        except Experiment.DoesNotExist:
-            return Response({"error": "Experiment not found"}, status=404)
 
-class ExperimentRecommendStructuresAPIView(APIView):
+class ExperimentRecommendStructuresAPIView(ConditionalResultMixin, APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, experiment_id):
-        try:
-            experiment = Experiment.objects.get(id=experiment_id, user=request.user)
-            results_folder_s3_url = experiment.results_folder_s3_url  + "/recommended_structures/"
-            result_urls = get_recommended_structures_with_viz(results_folder_s3_url)
-            return Response(result_urls)
+    def get_result_spec(self, request, experiment):
+        results_folder_s3_url = experiment.results_folder_s3_url  + "/recommended_structures/"
+        objects = get_result_objects(experiment)
 
-        except Experiment.DoesNotExist:
-            return Response({"error": "Experiment not found"}, status=404)
+        if request.GET.get("mode") == "compact":
+            build = lambda: get_recommended_structures_compact(
+                results_folder_s3_url,
+                objects=objects,
+                include_data=request.GET.get("include_data") == "true",
+                data_url=lambda filename: request.build_absolute_uri(
+                    reverse("experiment-recommend-structure-data", args=[experiment.id, filename])
+                ),
+            )
+        else:
+            build = lambda: get_recommended_structures_with_viz(
+                results_folder_s3_url, objects=objects
+            )
+
+        return ResultSpec(
+            build,
+            presigned_keys=[
+                obj["key"] for obj in objects or []
+                if obj["category"] == "recommended_structures"
+            ],
+        )
 
 
-class ExperimentGyrationRadiusAPIView(APIView):
+class ExperimentRecommendStructureDataAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, experiment_id):
+    def get(self, request, experiment_id, filename):
         try:
             experiment = Experiment.objects.get(id=experiment_id, user=request.user)
-            results_folder_s3_url = experiment.results_folder_s3_url  + "/gyrate.csv"
-            result = fetch_gyration_radius(results_folder_s3_url)
-            return Response(result)
-
         except Experiment.DoesNotExist:
             return Response({"error": "Experiment not found"}, status=404)
-        
 
-class ExperimentRMSDAPIView(APIView):
-    permission_classes = [IsAuthenticated]
+        if not filename.endswith(".pdb"):
+            return Response({"error": "Structure not found"}, status=404)
 
-    def get(self, request, experiment_id):
+        bucket, prefix = parse_s3_uri(experiment.results_folder_s3_url)
+        key = f"{prefix.rstrip('/')}/recommended_structures/{filename}"
         try:
-            experiment = Experiment.objects.get(id=experiment_id, user=request.user)
-            results_folder_s3_url = experiment.results_folder_s3_url  + "/rmsd.csv"
-            result = fetch_gyration_radius(results_folder_s3_url)
-            return Response(result)
+            pdb_data = get_recommended_structure_data(
+                bucket, key, get_artifact_etag(experiment, key)
+            )
+        except ClientError:
+            return Response({"error": "Structure not found"}, status=404)
+        except ValueError:
+            # Includes UnicodeDecodeError: the stored file isn't a text PDB.
+            return Response({"error": "Structure file could not be read"}, status=502)
 
-        except Experiment.DoesNotExist:
-            return Response({"error": "Experiment not found"}, status=404)
-        
+        return Response({"key": key, "filename": filename, "pdb_data": pdb_data})
 
-class ExperimentCMDOutput(APIView):
-    permission_classes = [IsAuthenticated]
 
-    def get(self, request, experiment_id):
+def parse_series_params(params):
+    errors = {}
+    parsed = {}
+
+    if params.get("points"):
         try:
-            experiment = Experiment.objects.get(id=experiment_id, user=request.user)
-            results_folder_s3_url = experiment.results_folder_s3_url  + "/output.csv"
-            result = fetch_cmd_output(results_folder_s3_url)
-            return Response(result)
+            parsed["points"] = int(params["points"])
+            if parsed["points"] < 3:
+                raise ValueError
+        except ValueError:
+            errors["points"] = "Expected an integer of at least 3."
 
-        except Experiment.DoesNotExist:
-            return Response({"error": "Experiment not found"}, status=404)
+    for name in ("x_min", "x_max"):
+        if params.get(name):
+            try:
+                parsed[name] = float(params[name])
+            except ValueError:
+                errors[name] = "Expected a number."
+
+    if params.get("method"):
+        if params["method"] not in DOWNSAMPLING_METHODS:
+            errors["method"] = f"Expected one of: {', '.join(DOWNSAMPLING_METHODS)}."
+        parsed["method"] = params["method"]
+
+    if errors:
+        raise ValidationError(errors)
+    return parsed
+
+
+class ExperimentGyrationRadiusAPIView(ConditionalResultMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    filename = "gyrate.csv"
+
+    def get_result_spec(self, request, experiment):
+        results_folder_s3_url = f"{experiment.results_folder_s3_url}/{self.filename}"
+        key = parse_s3_uri(results_folder_s3_url)[1]
+        series_params = parse_series_params(request.GET)
+        etag = get_artifact_etag(experiment, key)
+        return ResultSpec(
+            lambda: fetch_gyration_radius(results_folder_s3_url, etag=etag, **series_params),
+            artifact_keys=[key],
+        )
         
+
+class ExperimentRMSDAPIView(ExperimentGyrationRadiusAPIView):
+    filename = "rmsd.csv"
+        
+
+class ExperimentCMDOutput(ConditionalResultMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_result_spec(self, request, experiment):
+        results_folder_s3_url = experiment.results_folder_s3_url  + "/output.csv"
+        key = parse_s3_uri(results_folder_s3_url)[1]
+        etag = get_artifact_etag(experiment, key)
+        return ResultSpec(
+            lambda: fetch_cmd_output(results_folder_s3_url, etag=etag),
+            artifact_keys=[key],
+        )
+
+
+class ExperimentDashboardAPIView(ConditionalResultMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    SECTIONS = ("results", "rmsd", "gyration_radius", "cmd_output")
+
+    def get_result_spec(self, request, experiment):
+        include = self._get_included_sections(request.GET)
+        series_params = parse_series_params(request.GET)
+
+        # Resolve everything that needs the database here; worker threads only talk to S3.
+        results_folder_s3_url = experiment.results_folder_s3_url
+        objects = get_result_objects(experiment)
+        etags = {obj["key"]: obj["etag"] for obj in objects or []}
+        _, prefix = parse_s3_uri(results_folder_s3_url)
+
+        # The raising variants, so a failed section shows up in "errors".
+        def series(filename):
+            return lambda: get_series(
+                f"{results_folder_s3_url}/{filename}",
+                etag=etags.get(f"{prefix}/{filename}"),
+                **series_params
+            )
+
+        fetchers = {
+            "results": lambda: get_result_urls(results_folder_s3_url, objects=objects),
+            "rmsd": series("rmsd.csv"),
+            "gyration_radius": series("gyrate.csv"),
+            "cmd_output": lambda: get_cmd_output(
+                f"{results_folder_s3_url}/output.csv", etag=etags.get(f"{prefix}/output.csv")
+            ),
+        }
+        artifact_files = {
+            "rmsd": "rmsd.csv",
+            "gyration_radius": "gyrate.csv",
+            "cmd_output": "output.csv",
+        }
+
+        return ResultSpec(
+            lambda: self._fetch_sections({name: fetchers[name] for name in include}),
+            artifact_keys=[
+                f"{prefix}/{artifact_files[name]}" for name in include if name in artifact_files
+            ],
+            presigned_keys=[
+                obj["key"] for obj in objects or [] if obj["category"]
+            ] if "results" in include else [],
+        )
+
+    def _get_included_sections(self, params):
+        if not params.get("include"):
+            return list(self.SECTIONS)
+
+        include = [name for name in params["include"].split(",") if name]
+        if not include:
+            return list(self.SECTIONS)
+        unknown = set(include) - set(self.SECTIONS)
+        if unknown:
+            raise ValidationError({
+                "include": f"Unknown sections: {', '.join(sorted(unknown))}. "
+                           f"Expected any of: {', '.join(self.SECTIONS)}."
+            })
+        return include
+
+    def _fetch_sections(self, fetchers):
+        data = {"errors": {}}
+        with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+            futures = {name: executor.submit(fetch) for name, fetch in fetchers.items()}
+            for name, future in futures.items():
+                try:
+                    data[name] = future.result()
+                except Exception as e:
+                    data[name] = None
+                    data["errors"][name] = str(e)
+        return data
+
+
+class BatchJobEventsAPIView(APIView):
+    authentication_classes = []
+    permission_classes = [HasBatchEventsToken]
+
+    def post(self, request):
+        if not isinstance(request.data, (list, dict)):
+            return Response({"error": "Expected an event object or a list of events"}, status=400)
+        events = request.data if isinstance(request.data, list) else [request.data]
+
+        valid = [event for event in events if job_event_detail(event) is not None]
+        updated = apply_job_state_events(valid)
+        return Response({"received": len(events), "ignored": len(events) - len(valid), "updated": updated})
+
+
+STREAM_FIELDS = ['id', 'name', 'status']
+
+
+def parse_stream_cursor(value):
+    # No cursor means "changes from now on".
+    if not value:
+        return current_status_version()
+    try:
+        cursor = int(value)
+        if cursor < 0:
+            raise ValueError
+    except ValueError:
+        raise ValidationError({"since": "Expected a cursor returned by this endpoint."})
+    return cursor
+
+
+def parse_stream_wait(value):
+    try:
+        wait = float(value or 0)
+        # NaN would make the deadline unreachable.
+        if not math.isfinite(wait) or wait < 0:
+            raise ValueError
+    except ValueError:
+        raise ValidationError({"wait": "Expected a non-negative number of seconds."})
+    return min(wait, settings.EXPERIMENT_LONG_POLL_MAX_WAIT)
+
+
+def get_status_changes(user, cursor):
+    """
+    The user's experiments whose status changed after version ``cursor``,
+    and the cursor to continue from.
+    """
+    experiments = list(
+        Experiment.objects
+        .filter(user=user, status_version__gt=cursor)
+        .order_by("status_version", "id")
+    )
+    if not experiments:
+        return cursor, []
+
+    serializer = ExperimentSerializer(experiments, many=True, fields=STREAM_FIELDS)
+    return experiments[-1].status_version, serializer.data
+
+
+def format_status_event(cursor, changed):
+    return (
+        f"id: {cursor}\n"
+        f"event: status\n"
+        f"data: {json.dumps(changed)}\n\n"
+    )
+
+
+class ExperimentStatusStreamAPIView(APIView):
+    """
+    Pushes experiments whose batch status changed after the ``since`` cursor
+    (or the SSE Last-Event-ID). Serves Server-Sent Events when the client
+    accepts text/event-stream, and a single long-poll JSON response otherwise.
+    Streams end after EXPERIMENT_STREAM_TIMEOUT seconds; EventSource
+    reconnects on its own and resumes from the last event id.
+
+    Each open stream holds a worker thread; long-lived clients should use
+    /api/async/experiments/stream/, which waits on the event loop instead.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, EventStreamRenderer]
+
+    def get(self, request):
+        cursor = parse_stream_cursor(request.headers.get("Last-Event-ID") or request.query_params.get("since"))
+
+        if request.accepted_renderer.format == EventStreamRenderer.format:
+            response = StreamingHttpResponse(
+                self._event_stream(request.user, cursor),
+                content_type="text/event-stream",
+            )
+            response["Cache-Control"] = "no-cache"
+            response["X-Accel-Buffering"] = "no"
+            return response
+
+        deadline = time.monotonic() + parse_stream_wait(request.query_params.get("wait"))
+        while True:
+            cursor, changed = get_status_changes(request.user, cursor)
+            if changed or time.monotonic() >= deadline:
+                return Response({"cursor": cursor, "results": changed})
+            time.sleep(settings.EXPERIMENT_STREAM_POLL_INTERVAL)
+
+    def _event_stream(self, user, cursor):
+        yield f"retry: {settings.EXPERIMENT_STREAM_RETRY_MS}\n\n"
+
+        deadline = time.monotonic() + settings.EXPERIMENT_STREAM_TIMEOUT
+        last_sent = time.monotonic()
+        while time.monotonic() < deadline:
+            cursor, changed = get_status_changes(user, cursor)
+            if changed:
+                yield format_status_event(cursor, changed)
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= settings.EXPERIMENT_STREAM_KEEPALIVE:
+                # Comment line keeps proxies from closing an idle connection.
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            time.sleep(settings.EXPERIMENT_STREAM_POLL_INTERVAL)
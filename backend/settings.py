@@ -86,7 +86,7 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # settings.py
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachingTokenAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -143,5 +143,129 @@ STATIC_URL = 'static/'
 
 AWS_REGION_NAME='us-east-1'
 AWS_STORAGE_BUCKET_NAME="medvolt-cmd-standalone-test"
+# Point S3 at a local stand-in (e.g. MinIO) during development; None is AWS.
+AWS_S3_ENDPOINT_URL = None
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+
+# Application logs (api.*), including the background workers, go to stderr.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# Seconds between rounds of `manage.py poll_batch_statuses`.
+BATCH_STATUS_POLL_INTERVAL = 30
+
+# describe_jobs is split into 100-ID chunks, fetched concurrently on this many
+# threads; throttled chunks are retried up to BATCH_DESCRIBE_JOBS_MAX_ATTEMPTS.
+BATCH_DESCRIBE_JOBS_WORKERS = 8
+BATCH_DESCRIBE_JOBS_MAX_ATTEMPTS = 5
+
+# Result manifests (S3 listings) the poller builds per round for finished
+# experiments that don't have one yet, e.g. ones finished via batch events.
+RESULT_MANIFEST_BUILDS_PER_ROUND = 50
+
+# Presigned GET URLs are reused from an in-process LRU until they have less
+# than PRESIGNED_URL_MIN_TTL seconds of validity left.
+PRESIGNED_URL_CACHE_SIZE = 10000
+PRESIGNED_URL_MIN_TTL = 900
+
+# Recommended structures are fetched and rendered on this many threads. Must
+# stay below the S3 client's max_pool_connections (50).
+RECOMMENDED_STRUCTURES_WORKERS = 8
+
+# Rendered structure HTML is cached by content hash in a per-process LRU and,
+# when VISUALIZATION_CACHE_DIR is set, on disk shared by all workers, evicted
+# least-recently-used beyond VISUALIZATION_CACHE_MAX_BYTES.
+VISUALIZATION_CACHE_SIZE = 256
+VISUALIZATION_CACHE_DIR = None
+VISUALIZATION_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# gyrate.csv / rmsd.csv are converted once per ETag into .npy columns here and
+# memory-mapped on later requests; least-recently-used entries are evicted
+# beyond TRAJECTORY_CACHE_MAX_BYTES.
+TRAJECTORY_CACHE_DIR = BASE_DIR / 'cache' / 'trajectories'
+TRAJECTORY_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# Cache-Control max-age for result endpoints: while the job is still running,
+# and for finished jobs whose responses embed presigned URLs (which must be
+# revalidated well before PRESIGNED_URL_MIN_TTL runs out). Other finished
+# results are immutable.
+RESULT_RUNNING_MAX_AGE = 10
+RESULT_PRESIGNED_MAX_AGE = 60
+
+# Threads available to the async (ASGI) result views for blocking boto3 calls.
+ASYNC_S3_MAX_WORKERS = 50
+
+# Read-through disk cache for S3 result objects whose ETag is known up front,
+# shared by all workers on the host and evicted least-recently-used.
+BLOB_CACHE_DIR = BASE_DIR / 'cache' / 'blobs'
+BLOB_CACHE_MAX_BYTES = 5 * 1024 * 1024 * 1024
+
+# Shared secret EventBridge sends as X-Batch-Events-Token when posting Batch
+# job state changes to /api/batch-events/. Ingestion is disabled while unset.
+BATCH_EVENTS_TOKEN = None
+
+# /api/experiments/stream/ (and its async twin): how often the database is checked for status
+# changes, how long an SSE connection stays open before the client reconnects,
+# the keepalive interval, and the longest long-poll wait.
+EXPERIMENT_STREAM_POLL_INTERVAL = 2
+EXPERIMENT_STREAM_TIMEOUT = 55
+EXPERIMENT_STREAM_KEEPALIVE = 15
+EXPERIMENT_STREAM_RETRY_MS = 3000
+EXPERIMENT_LONG_POLL_MAX_WAIT = 25
+
+# Per-process cache of authenticated tokens (see api.authentication). Logout,
+# token deletion and user changes only clear the handling process's entry, so
+# other processes may accept a revoked token for up to AUTH_TOKEN_CACHE_TTL
+# seconds; lower it to tighten that window at the cost of more auth queries.
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60
+
+# Response bodies of finished experiments' result endpoints are cached in the
+# RESULT_CACHE_ALIAS cache (see api.mixins.ConditionalResultMixin). The file
+# backend is shared by all workers on the host; presigned URLs are re-signed
+# on every hit, so entries only age out through TIMEOUT and MAX_ENTRIES.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'results': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'responses',
+        'TIMEOUT': 7 * 24 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+RESULT_CACHE_ALIAS = 'results'
+
+# Multipart uploads (/api/uploads/multipart/): the default part size, grown
+# automatically for objects that would need more than 10,000 parts, and the
+# most part URLs presigned in one request.
+MULTIPART_UPLOAD_PART_SIZE = 64 * 1024 * 1024
+MULTIPART_UPLOAD_MAX_PRESIGN_PARTS = 1000
+
+# Experiment submission checks the SMILES string and reads only the first
+# PDB_VALIDATION_SAMPLE_BYTES of the uploaded PDB before queueing a job.
+PDB_VALIDATION_SAMPLE_BYTES = 256 * 1024
+SMILES_MAX_LENGTH = 2000
+
+# `manage.py submit_batch_jobs` drains the BatchSubmission outbox: up to
+# BATCH_SUBMISSION_BATCH_SIZE rows per round on BATCH_SUBMISSION_WORKERS
+# threads, each claimed for BATCH_SUBMISSION_LEASE seconds. Failed submissions
+# are retried with exponential backoff (seconds) up to
+# BATCH_SUBMISSION_MAX_ATTEMPTS, after which the experiment is marked FAILED.
+BATCH_SUBMISSION_POLL_INTERVAL = 1
+BATCH_SUBMISSION_BATCH_SIZE = 50
+BATCH_SUBMISSION_WORKERS = 8
+BATCH_SUBMISSION_LEASE = 300
+BATCH_SUBMISSION_MAX_ATTEMPTS = 8
+BATCH_SUBMISSION_RETRY_BASE = 2
+BATCH_SUBMISSION_RETRY_MAX = 300